@@ -0,0 +1,220 @@
+import time
+import numpy as np
+import batch
+import hull
+
+# Rotating calipers analytics on convex hulls
+# Every hull edge is a side of the tightest rectangle with that orientation. The three other
+# calipers (the vertex farthest along the edge, the one farthest behind it and the one farthest
+# above it) all move forward as the edges turn counterclockwise, so each is found by a searchsorted
+# of the edge angles instead of a scan. That gives the width, the minimum area and minimum
+# perimeter rectangles and the antipodal pairs for the diameter in O(h log h) with no Python loops
+# Every hull in a batch is done at once, a single hull is a batch of one
+#
+#   result = analytics.calipers(hull.convex_hull(points))
+#   print(result['diameter'], result['width'], result['min_area_rectangle'])
+
+# Sum of every segment of values
+# Parameters:
+#   values: An (n,) array
+#   starts, counts: The first index and size of every segment
+# Returns:
+#   The sum of every segment, 0 for empty segments
+def segment_sum(values, starts, counts):
+    total = np.zeros(len(counts))
+    nonempty = counts > 0
+    total[nonempty] = np.add.reduceat(values, starts[nonempty])
+    return total
+
+# Find the analytics of every hull in a batch
+# Parameters:
+#   hulls: An (n, 2) array of concatenated hulls, each in counterclockwise order like batch_hulls returns
+#   offsets: The len(hulls) + 1 offsets of the hulls into the array
+# Returns:
+#   A dictionary of arrays with one entry per hull (NaN for empty hulls):
+#     area, perimeter: The area and perimeter of the hull
+#     diameter: The largest distance between 2 hull points
+#     diameter_pair: A (2, 2) array of the 2 points at that distance
+#     width: The smallest distance between 2 parallel lines on either side of the hull
+#     min_area_rectangle, min_perimeter_rectangle: (4, 2) arrays of the corners of the smallest
+#       enclosing rectangles in counterclockwise order
+#     min_rectangle_area, min_rectangle_perimeter: Their area and perimeter
+def batch_calipers(hulls, offsets):
+    points = hull.as_points(hulls).astype(np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    count = np.diff(offsets)
+    starts = offsets[:-1]
+    sets = len(count)
+    segment = np.repeat(np.arange(sets), count)
+    local = np.arange(len(points)) - starts[segment]
+    size = count[segment]
+    following = starts[segment] + (local + 1) % np.maximum(size, 1)
+
+    # Edge i goes from point i to point i + 1
+    edge = points[following] - points
+    length = np.hypot(edge[:, 0], edge[:, 1])
+    unit = np.zeros_like(edge)
+    unit[:, 0] = 1
+    np.divide(edge, length[:, None], out=unit, where=length[:, None] > 0)
+    normal = np.stack((-unit[:, 1], unit[:, 0]), axis=1)
+
+    # Edge angles turn counterclockwise from the first edge of every hull, they're laid out twice
+    # per hull so a search never has to wrap around, and hulls are kept apart by 8 pi
+    angle = np.arctan2(unit[:, 1], unit[:, 0])
+    angle = np.mod(angle - angle[starts[segment]], 2 * np.pi)
+    angle[length == 0] = 0
+    first = 2 * starts[segment] + local
+    keys = np.empty(2 * len(points))
+    keys[first] = angle + 8 * np.pi * segment
+    keys[first + size] = angle + 2 * np.pi + 8 * np.pi * segment
+    vertex = np.empty(2 * len(points), dtype=np.int64)
+    vertex[first] = np.arange(len(points))
+    vertex[first + size] = np.arange(len(points))
+
+    # The caliper at turn is the first vertex with its outgoing edge at least turn past edge i
+    # Rounding can leave it one vertex off so both neighbours are tried as well
+    def caliper(turn, score):
+        found = vertex[np.searchsorted(keys, angle + turn + 8 * np.pi * segment)]
+        best = None
+        for shift in (-1, 0, 1):
+            candidate = starts[segment] + (found - starts[segment] + shift) % np.maximum(size, 1)
+            value = score(points[candidate] - points)
+            if best is None:
+                best, index = value, candidate
+            else:
+                better = value > best
+                best = np.where(better, value, best)
+                index = np.where(better, candidate, index)
+        return best, index
+
+    front, _ = caliper(np.pi / 2, lambda d: np.einsum('ij,ij->i', d, unit))
+    back, _ = caliper(3 * np.pi / 2, lambda d: -np.einsum('ij,ij->i', d, unit))
+    height, top = caliper(np.pi, lambda d: np.einsum('ij,ij->i', d, normal))
+    back = -back
+
+    # Rectangle on every edge
+    span = front - back
+    rectangle_area = span * height
+    rectangle_perimeter = 2 * (span + height)
+    corner0 = points + back[:, None] * unit
+    corner1 = points + front[:, None] * unit
+    corners = np.stack((corner0, corner1, corner1 + height[:, None] * normal, corner0 + height[:, None] * normal), axis=1)
+
+    # Vertex i is antipodal to every vertex from the top of edge i - 1 to the top of edge i
+    before = starts[segment] + (local - 1) % np.maximum(size, 1)
+    low = top[before] - starts[segment] - 1
+    pairs = np.minimum((top - top[before]) % np.maximum(size, 1) + 3, size)
+    first_pair = np.cumsum(pairs) - pairs
+    a = np.repeat(np.arange(len(points)), pairs)
+    b = starts[segment][a] + (low[a] + np.arange(len(a)) - np.repeat(first_pair, pairs)) % np.maximum(size[a], 1)
+    distance = np.sum((points[a] - points[b]) ** 2, axis=1)
+    pair_starts = np.zeros(sets, dtype=np.int64)
+    pair_counts = np.bincount(segment, weights=pairs, minlength=sets).astype(np.int64)
+    np.cumsum(pair_counts[:-1], out=pair_starts[1:])
+    far = batch.segment_argmax(distance, segment[a], pair_starts, pair_counts) if len(a) else np.zeros(sets, dtype=np.int64)
+
+    narrow = batch.segment_argmax(-height, segment, starts, count) if len(points) else np.zeros(sets, dtype=np.int64)
+    small = batch.segment_argmax(-rectangle_area, segment, starts, count) if len(points) else np.zeros(sets, dtype=np.int64)
+    short = batch.segment_argmax(-rectangle_perimeter, segment, starts, count) if len(points) else np.zeros(sets, dtype=np.int64)
+
+    cross = points[:, 0] * points[following, 1] - points[following, 0] * points[:, 1]
+    empty = count == 0
+    result = {
+        'area': segment_sum(cross, starts, count) / 2,
+        'perimeter': segment_sum(length, starts, count),
+        'diameter': np.sqrt(distance[far]) if len(a) else np.zeros(sets),
+        'diameter_pair': np.stack((points[a[far]], points[b[far]]), axis=1) if len(a) else np.zeros((sets, 2, 2)),
+        'width': height[narrow] if len(points) else np.zeros(sets),
+        'min_area_rectangle': corners[small] if len(points) else np.zeros((sets, 4, 2)),
+        'min_rectangle_area': rectangle_area[small] if len(points) else np.zeros(sets),
+        'min_perimeter_rectangle': corners[short] if len(points) else np.zeros((sets, 4, 2)),
+        'min_rectangle_perimeter': rectangle_perimeter[short] if len(points) else np.zeros(sets),
+    }
+    for values in result.values():
+        values[empty] = np.nan
+    return result
+
+# Find the analytics of one hull
+# Parameters:
+#   polygon: An (h, 2) array of a convex hull in counterclockwise order, like hull.convex_hull returns
+# Returns:
+#   A dictionary of the same analytics as batch_calipers for this hull
+def calipers(polygon):
+    polygon = hull.as_points(polygon)
+    result = batch_calipers(polygon, [0, len(polygon)])
+    return {name: float(values[0]) if values.ndim == 1 else values[0] for name, values in result.items()}
+
+# Brute force versions of the analytics working on all the points, for checking and benchmarking
+# Parameters:
+#   points: An (n, 2) array of points
+# Returns:
+#   The diameter, in O(n^2)
+def brute_diameter(points):
+    points = hull.as_points(points).astype(np.float64)
+    best = 0.0
+    for start in range(0, len(points), 1024):
+        block = points[start:start + 1024]
+        d = (block[:, None, 0] - points[None, :, 0]) ** 2 + (block[:, None, 1] - points[None, :, 1]) ** 2
+        best = max(best, d.max())
+    return np.sqrt(best)
+
+# Parameters:
+#   points: An (n, 2) array of points
+#   polygon: The convex hull of the points
+# Returns:
+#   The width and the minimum rectangle area, in O(n h)
+def brute_width_rectangle(points, polygon):
+    points = hull.as_points(points).astype(np.float64)
+    polygon = hull.as_points(polygon).astype(np.float64)
+    width = np.inf
+    area = np.inf
+    for i in range(len(polygon)):
+        edge = polygon[(i + 1) % len(polygon)] - polygon[i]
+        unit = edge / np.hypot(*edge)
+        d = points - polygon[i]
+        along = d @ unit
+        height = (d @ np.array([-unit[1], unit[0]])).max()
+        width = min(width, height)
+        area = min(area, (along.max() - along.min()) * height)
+    return width, area
+
+def main():
+    rng = np.random.default_rng(0)
+    for n in (1000, 10000):
+        points = rng.integers(0, 10001, (n, 2))
+        polygon = hull.convex_hull(points)
+
+        start = time.time()
+        result = calipers(polygon)
+        end = time.time()
+        fast = end - start
+
+        start = time.time()
+        diameter = brute_diameter(points)
+        width, area = brute_width_rectangle(points, polygon)
+        end = time.time()
+
+        print("n=%d h=%d: calipers %.4fs, brute force %.4fs (%.0fx)  diameter %.3f/%.3f width %.3f/%.3f area %.1f/%.1f" %
+              (n, len(polygon), fast, end - start, (end - start) / fast, result['diameter'], diameter,
+               result['width'], width, result['min_rectangle_area'], area))
+
+    # Many small hulls at once against one call per hull
+    sets = 10000
+    counts = rng.integers(50, 150, sets)
+    offsets = np.zeros(sets + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    hulls, hull_offsets = batch.batch_hulls(rng.integers(0, 10001, (offsets[-1], 2)), offsets)
+
+    start = time.time()
+    for polygon in batch.split(hulls, hull_offsets):
+        calipers(polygon)
+    end = time.time()
+    loop = end - start
+
+    start = time.time()
+    batch_calipers(hulls, hull_offsets)
+    end = time.time()
+    print("%d hulls: loop %.3fs, batch %.3fs (%.1fx)" % (sets, loop, end - start, loop / (end - start)))
+
+if __name__ == "__main__":
+    main()
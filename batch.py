@@ -0,0 +1,205 @@
+import time
+import numpy as np
+import filters
+import hull
+
+# Convex hulls of many small point sets in one call
+# The point sets are concatenated into one (n, 2) array and split by an offsets array like a CSR
+# matrix, set s is points[offsets[s]:offsets[s + 1]]. Every step of the Graham Scan runs on all the
+# sets at once so the Python overhead is paid per step instead of per set
+#
+#   points, offsets = batch.pack(point_sets)
+#   hulls, hull_offsets = batch.batch_hulls(points, offsets)
+#   for h in batch.split(hulls, hull_offsets): ...
+
+# Concatenate point sets for batch_hulls
+# Parameters:
+#   point_sets: A list of (m, 2) arrays or lists of [x, y] points
+# Returns:
+#   points: An (n, 2) array of all the points
+#   offsets: An int64 array of len(point_sets) + 1 offsets into points
+def pack(point_sets):
+    point_sets = [hull.as_points(np.asarray(p).reshape(-1, 2)) for p in point_sets]
+    offsets = np.zeros(len(point_sets) + 1, dtype=np.int64)
+    np.cumsum([len(p) for p in point_sets], out=offsets[1:])
+    if not point_sets:
+        return np.empty((0, 2), dtype=np.int64), offsets
+    return np.concatenate(point_sets), offsets
+
+# Split concatenated points back into their sets
+# Parameters:
+#   points: An (n, 2) array of points
+#   offsets: The len(sets) + 1 offsets into points
+# Returns:
+#   A list of views of every set
+def split(points, offsets):
+    return [points[start:end] for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+# Find the first index of the largest value in every segment
+# Parameters:
+#   values: An (n,) array
+#   segment: The segment of every value, in increasing order
+#   starts, counts: The first index and size of every segment
+# Returns:
+#   The index of the largest value of every segment, only meaningful for non-empty segments
+def segment_argmax(values, segment, starts, counts):
+    nonempty = counts > 0
+    best = np.full(len(counts), -np.inf)
+    best[nonempty] = np.maximum.reduceat(values, starts[nonempty])
+    hits = np.flatnonzero(values == best[segment])
+    first = np.searchsorted(segment[hits], np.arange(len(counts)))
+    return hits[np.minimum(first, len(hits) - 1)]
+
+# Find the anchor of every segment, the lowest y-coordinate and then x-coordinate point
+# Parameters:
+#   points: An (n, 2) array of points
+#   segment, starts, counts: The segments of the points
+# Returns:
+#   The index of the anchor of every segment
+def segment_anchors(points, segment, starts, counts):
+    y = points[:, 1]
+    lowest = segment_argmax(-y.astype(np.float64), segment, starts, counts)
+    # Among the lowest points pick the one farthest left
+    x = np.where(y == y[lowest][segment], -points[:, 0].astype(np.float64), -np.inf)
+    return segment_argmax(x, segment, starts, counts)
+
+# Akl-Toussaint heuristic on every segment at once
+# Same as filters.akl_toussaint, the extremes along k directions make a polygon per segment and
+# every point strictly inside its segment's polygon is thrown away
+# Parameters:
+#   points: An (n, 2) array of points
+#   segment, starts, counts: The segments of the points
+#   k: The number of directions
+# Returns:
+#   A boolean mask of the points to keep
+def segment_filter(points, segment, starts, counts, k):
+    projection = filters.directions(k) @ points.T
+    vertices = np.stack([points[segment_argmax(row, segment, starts, counts)] for row in projection], axis=1)
+
+    # Point p is strictly left of edge a -> b when ex * py - ey * px > ex * ay - ey * ax
+    # The edge terms are worked out once per segment and repeated over its points
+    x = points[:, 0]
+    y = points[:, 1]
+    inside = np.ones(len(points), dtype=bool)
+    edges = np.zeros(len(counts), dtype=bool)
+    for j in range(k):
+        a = vertices[:, j]
+        b = vertices[:, (j + 1) % k]
+        ex = b[:, 0] - a[:, 0]
+        ey = b[:, 1] - a[:, 1]
+        c = ex * a[:, 1] - ey * a[:, 0]
+        # Two directions can share an extreme point, the edge between them doesn't constrain anything
+        empty = (ex == 0) & (ey == 0)
+        c[empty] = -1
+        edges |= ~empty
+        inside &= np.repeat(ex, counts) * y - np.repeat(ey, counts) * x > np.repeat(c, counts)
+
+    # A polygon with no edges is a single point and has nothing inside it, and sets of less than
+    # 3 points are their own hull
+    return ~inside | np.repeat(~edges | (counts < 3), counts)
+
+# Find the convex hull of every point set
+# Parameters:
+#   points: An (n, 2) array of the concatenated point sets
+#   offsets: The len(sets) + 1 offsets of the sets into points, starting at 0 and ending at n
+#   k: The number of Akl-Toussaint directions, 0 skips the heuristic (Default: 8)
+# Returns:
+#   hulls: An (h, 2) array of the concatenated hulls, each in counterclockwise order starting at its anchor
+#   hull_offsets: The len(sets) + 1 offsets of the hulls into hulls
+def batch_hulls(points, offsets, k=8):
+    points = hull.as_points(points)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if offsets.ndim != 1 or len(offsets) == 0 or offsets[0] != 0 or offsets[-1] != len(points) or np.any(np.diff(offsets) < 0):
+        raise ValueError("offsets must increase from 0 to the number of points")
+
+    sets = len(offsets) - 1
+    counts = np.diff(offsets)
+    if len(points) == 0:
+        return points.copy(), np.zeros(sets + 1, dtype=np.int64)
+    segment = np.repeat(np.arange(sets), counts)
+
+    # Throw away the points that can't be on their hull
+    if k:
+        keep = segment_filter(points, segment, offsets[:-1], counts, k)
+        points = points[keep]
+        segment = segment[keep]
+        counts = np.bincount(segment, minlength=sets)
+    starts = np.zeros(sets, dtype=np.int64)
+    np.cumsum(counts[:-1], out=starts[1:])
+
+    # Sort every segment by angle around its anchor with one lexsort, segment first
+    anchors = points[segment_anchors(points, segment, starts, counts)]
+    dx = points[:, 0] - anchors[segment, 0]
+    dy = points[:, 1] - anchors[segment, 1]
+    angle = np.zeros(len(points))
+    total = np.abs(dx) + dy
+    np.divide(dx, total, out=angle, where=total != 0)
+    angle = 1 - angle
+    angle[total == 0] = 0
+    order = hull.exact_order(dx, dy, np.lexsort((total, angle, segment)), angle, segment)
+    points = points[order]
+    x = points[:, 0]
+    y = points[:, 1]
+
+    # Every segment's stack lives in its own slice of one array, since a hull never has more points
+    # than its segment. Step i pushes the i-th point of every segment that has one, segments are
+    # ordered by size so those are always the first ones
+    stack = np.zeros(len(points), dtype=np.int64)
+    top = np.zeros(sets, dtype=np.int64)
+    by_size = np.argsort(-counts, kind='stable')
+    # The number of segments with more than i points for every step i
+    active = np.searchsorted(-counts[by_size], -np.arange(counts.max(initial=0)), side='left')
+    for i, size in enumerate(active.tolist()):
+        step = by_size[:size]
+        point = starts[step] + i
+
+        # Copies are next to each other in sorted order, skip a point equal to the top of its stack
+        # like hull.scan does
+        last = stack[starts[step] + np.maximum(top[step] - 1, 0)]
+        new = (top[step] == 0) | (x[last] != x[point]) | (y[last] != y[point])
+        step, point = step[new], point[new]
+
+        # Pop while the last 2 points of the stack and the new point don't make a ccw turn
+        popping, candidate = step, point
+        while len(popping):
+            t = top[popping]
+            more = t >= 2
+            popping, candidate, t = popping[more], candidate[more], t[more]
+            base = starts[popping] + t
+            a = stack[base - 2]
+            b = stack[base - 1]
+            turn = (x[b] - x[a]) * (y[candidate] - y[a]) - (x[candidate] - x[a]) * (y[b] - y[a])
+            popping, candidate = popping[turn <= 0], candidate[turn <= 0]
+            top[popping] -= 1
+
+        stack[starts[step] + top[step]] = point
+        top[step] += 1
+
+    segment = np.repeat(np.arange(sets), counts)
+    on_hull = np.arange(len(points)) - starts[segment] < top[segment]
+    hull_offsets = np.zeros(sets + 1, dtype=np.int64)
+    np.cumsum(top, out=hull_offsets[1:])
+    return points[stack[on_hull]], hull_offsets
+
+def main():
+    rng = np.random.default_rng(0)
+    for sets, size in ((100000, 10), (10000, 100), (1000, 1000)):
+        counts = rng.integers(size // 2, size * 3 // 2, sets, endpoint=True)
+        offsets = np.zeros(sets + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        points = rng.integers(0, 10001, (offsets[-1], 2))
+
+        start = time.time()
+        for part in split(points, offsets):
+            hull.graham_scan(part)
+        end = time.time()
+        loop = end - start
+
+        start = time.time()
+        batch_hulls(points, offsets)
+        end = time.time()
+
+        print("%6d sets of ~%4d points: loop %.3fs, batch %.3fs (%.1fx)" % (sets, size, loop, end - start, loop / (end - start)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import filters
+import hull
+import mainb
+
+# Create Points Variables (points ranging from min to max like mainb.py)
+min = 0
+max = 10000
+
+# Point distributions to benchmark on
+# Every function takes a numpy random generator and n and returns an (n, 2) int64 array
+def uniform_square(rng, n):
+    return rng.integers(min, max, (n, 2), endpoint=True)
+
+def uniform_disk(rng, n):
+    r = np.sqrt(rng.random(n)) * (max - min) / 2
+    theta = rng.random(n) * 2 * np.pi
+    return np.rint(np.stack((r * np.cos(theta), r * np.sin(theta)), axis=1) + (max + min) / 2).astype(np.int64)
+
+def gaussian(rng, n):
+    points = rng.normal((max + min) / 2, (max - min) / 8, (n, 2))
+    return np.clip(np.rint(points), min, max).astype(np.int64)
+
+def circle(rng, n):
+    theta = rng.random(n) * 2 * np.pi
+    r = (max - min) / 2
+    return np.rint(np.stack((r * np.cos(theta), r * np.sin(theta)), axis=1) + (max + min) / 2).astype(np.int64)
+
+# Half the points are copies of 100 points and the rest lie on 10 lines through the middle
+def degenerate(rng, n):
+    pool = rng.integers(min, max, (100, 2), endpoint=True)
+    copies = pool[rng.integers(0, 100, n - n // 2)]
+    slope = rng.integers(-5, 6, (10, 2))
+    t = rng.integers(-(max - min) // 10, (max - min) // 10, n // 2, endpoint=True)
+    line = rng.integers(0, 10, n // 2)
+    lines = np.clip(slope[line] * t[:, None] + (max + min) // 2, min, max)
+    return np.concatenate((copies, lines))
+
+DISTRIBUTIONS = {
+    'square': uniform_square,
+    'disk': uniform_disk,
+    'gaussian': gaussian,
+    'circle': circle,
+    'degenerate': degenerate,
+}
+
+# Run the list based pipeline from mainb.py main()
+# Parameters:
+#   points: The list of [x, y] points
+#   sort: The sort to put the points in polar angle order, not used with collapse
+#   heuristic: The Akl-Toussaint heuristic to run first (Default: None)
+#   collapse: Whether to remove duplicates and collinear points instead of sorting, mainb.collapse
+#     returns them in polar angle order already (Default: False)
+# Returns:
+#   The convex hull
+def list_pipeline(points, sort, heuristic=None, collapse=False):
+    if heuristic:
+        points = heuristic(points)
+    anchor = mainb.get_anchor(points)
+    if collapse:
+        return mainb.graham_scan(mainb.collapse(points, anchor), anchor)
+    return mainb.graham_scan(sort(points, anchor), anchor)
+
+# Pipelines to benchmark
+# 'list' pipelines take a list of [x, y] points and 'array' pipelines take an (n, 2) array
+PIPELINES = {
+    'quicksort': ('list', lambda points: list_pipeline(points, mainb.quicksort)),
+    'quicksort2': ('list', lambda points: list_pipeline(points, mainb.quicksort2)),
+    'quicksort3': ('list', lambda points: list_pipeline(points, mainb.quicksort3)),
+    'angular_sort': ('list', lambda points: list_pipeline(points, mainb.angular_sort)),
+    'akl_toussaint': ('list', lambda points: list_pipeline(points, mainb.quicksort, mainb.akl_toussaint)),
+    'akl_toussaint_oct': ('list', lambda points: list_pipeline(points, mainb.quicksort, mainb.akl_toussaint_oct)),
+    'column_filter': ('list', lambda points: list_pipeline(points, mainb.quicksort, mainb.column_filter)),
+    'collapse': ('list', lambda points: list_pipeline(points, None, collapse=True)),
+    'sample_filter': ('list', lambda points: list_pipeline(points, mainb.quicksort, mainb.sample_filter)),
+}
+for name in list(hull.ALGORITHMS) + ['auto']:
+    PIPELINES['hull-' + name] = ('array', lambda points, name=name: hull.convex_hull(points, name))
+
+# Throw away filters to report the reduction of
+# Every function takes an (n, 2) array and returns the fraction of points that survive
+FILTERS = {
+    'akl_toussaint': lambda points: filters.akl_toussaint(points, 4)[1],
+    'akl_toussaint_oct': lambda points: filters.akl_toussaint(points, 8)[1],
+    'column_extremes': lambda points: (filters.column_extremes(points) or (None, 1.0))[1],
+    'sample_filter': lambda points: filters.sample_filter(points)[1],
+}
+
+# Time a pipeline on one point set
+# Parameters:
+#   pipeline: The name of the pipeline in PIPELINES
+#   points: An (n, 2) array of points
+#   repeats: The number of timed runs, after one untimed warm up run
+# Returns:
+#   times: The seconds taken by every run
+#   peak: The peak bytes allocated during one more run
+def measure(pipeline, points, repeats):
+    kind, run = PIPELINES[pipeline]
+    data = points.tolist() if kind == 'list' else points
+
+    # Lazy imports and first call set up would only ever be paid by the first timed run
+    run(data)
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run(data)
+        times.append(time.perf_counter() - start)
+
+    # Memory is measured on its own run since tracing slows everything down
+    tracemalloc.start()
+    run(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return times, peak
+
+# Measure the throughput of a pipeline run from a thread pool
+# Nothing in the pipelines is shared between calls so any speedup comes from the numpy stages that
+# release the GIL
+# Parameters:
+#   pipeline: The name of the pipeline in PIPELINES
+#   points: An (n, 2) array of points
+#   threads: The thread counts to try
+#   tasks: The number of hulls to find at every thread count
+# Returns:
+#   A list of results for every thread count
+def scaling(pipeline, points, threads, tasks):
+    kind, run = PIPELINES[pipeline]
+    data = points.tolist() if kind == 'list' else points
+
+    # Lazy imports and first call set up aren't timed, the pool warm up below only covers its threads
+    run(data)
+
+    results = []
+    for count in threads:
+        with ThreadPoolExecutor(count) as pool:
+            # Warm up the pool so thread start up isn't timed
+            list(pool.map(run, [data] * count))
+
+            start = time.perf_counter()
+            list(pool.map(run, [data] * tasks))
+            seconds = time.perf_counter() - start
+        results.append({'threads': count, 'seconds': seconds, 'hulls_per_second': tasks / seconds})
+    return results
+
+# Get the machine the benchmark is running on
+def machine():
+    return {
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+    }
+
+# Run every pipeline on every distribution and size
+# Parameters:
+#   pipelines, distributions, sizes: What to benchmark
+#   repeats: The number of timed runs of each benchmark
+#   seed: The random seed for the point sets
+#   max_list_size: The largest n to run the list pipelines on
+# Returns:
+#   The benchmark report
+def run(pipelines, distributions, sizes, repeats=5, seed=0, max_list_size=10**6):
+    results = []
+    for distribution in distributions:
+        for n in sizes:
+            points = DISTRIBUTIONS[distribution](np.random.default_rng(seed), n)
+            for pipeline in pipelines:
+                if PIPELINES[pipeline][0] == 'list' and n > max_list_size:
+                    continue
+                times, peak = measure(pipeline, points, repeats)
+                results.append({
+                    'pipeline': pipeline,
+                    'distribution': distribution,
+                    'n': n,
+                    'seed': seed,
+                    'times': times,
+                    'median': float(np.median(times)),
+                    'p95': float(np.percentile(times, 95)),
+                    'peak_memory': peak,
+                })
+                print("%-18s %-10s %10d  median %9.4fs  p95 %9.4fs  peak %8.1f MB" %
+                      (pipeline, distribution, n, results[-1]['median'], results[-1]['p95'], peak / 2**20))
+
+    return {
+        'machine': machine(),
+        'config': {'repeats': repeats, 'seed': seed, 'min': min, 'max': max},
+        'results': results,
+    }
+
+# Run the thread scaling benchmark on every pipeline, distribution and size
+# Parameters:
+#   pipelines, distributions, sizes: What to benchmark
+#   threads: The thread counts to try
+#   tasks: The number of hulls to find at every thread count
+#   seed: The random seed for the point sets
+#   max_list_size: The largest n to run the list pipelines on
+# Returns:
+#   The list of scaling results
+def run_scaling(pipelines, distributions, sizes, threads, tasks=16, seed=0, max_list_size=10**6):
+    results = []
+    for distribution in distributions:
+        for n in sizes:
+            points = DISTRIBUTIONS[distribution](np.random.default_rng(seed), n)
+            for pipeline in pipelines:
+                if PIPELINES[pipeline][0] == 'list' and n > max_list_size:
+                    continue
+                found = scaling(pipeline, points, threads, tasks)
+                for result in found:
+                    result.update({'pipeline': pipeline, 'distribution': distribution, 'n': n})
+                    print("%-18s %-10s %10d  %3d threads  %9.1f hulls/s  (%.2fx)" %
+                          (pipeline, distribution, n, result['threads'], result['hulls_per_second'],
+                           result['hulls_per_second'] / found[0]['hulls_per_second']))
+                results.extend(found)
+    return results
+
+# Measure how much every filter reduces every distribution
+# Parameters:
+#   distributions, sizes: What to measure
+#   seed: The random seed for the point sets
+# Returns:
+#   The list of reduction results
+def run_reduction(distributions, sizes, seed=0):
+    results = []
+    for distribution in distributions:
+        for n in sizes:
+            points = DISTRIBUTIONS[distribution](np.random.default_rng(seed), n)
+            for name, run in FILTERS.items():
+                start = time.perf_counter()
+                fraction = run(points)
+                seconds = time.perf_counter() - start
+                results.append({'filter': name, 'distribution': distribution, 'n': n,
+                                'survivors': fraction, 'seconds': seconds})
+                print("%-18s %-10s %10d  keeps %7.3f%%  in %8.4fs" % (name, distribution, n, 100 * fraction, seconds))
+    return results
+
+# Compare a report against a stored baseline
+# Parameters:
+#   report: The new benchmark report
+#   baseline: The baseline benchmark report
+#   tolerance: How much slower than the baseline median still counts as the same (Default: 0.1)
+# Returns:
+#   A list of (result, baseline result) pairs that got slower
+def compare(report, baseline, tolerance=0.1):
+    old = {(r['pipeline'], r['distribution'], r['n']): r for r in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        before = old.get((result['pipeline'], result['distribution'], result['n']))
+        if before is not None and result['median'] > before['median'] * (1 + tolerance):
+            regressions.append((result, before))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the convex hull pipelines")
+    parser.add_argument('--pipelines', nargs='+', default=list(PIPELINES), choices=PIPELINES)
+    parser.add_argument('--distributions', nargs='+', default=list(DISTRIBUTIONS), choices=DISTRIBUTIONS)
+    parser.add_argument('--sizes', nargs='+', type=lambda s: int(float(s)), default=[10**3, 10**4, 10**5],
+                        help="numbers of points, e.g. 1e3 1e5 1e8")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-list-size', type=lambda s: int(float(s)), default=10**6,
+                        help="largest size to run the list based pipelines on")
+    parser.add_argument('--output', help="write the report to this JSON file")
+    parser.add_argument('--baseline', help="JSON report to check for regressions against")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="allowed slowdown over the baseline median")
+    parser.add_argument('--threads', nargs='+', type=int, help="also measure throughput at these thread pool sizes")
+    parser.add_argument('--tasks', type=int, default=16, help="hulls to find at every thread pool size")
+    parser.add_argument('--reduction', action='store_true', help="also report how much every filter reduces the points")
+    args = parser.parse_args(argv)
+
+    report = run(args.pipelines, args.distributions, args.sizes, args.repeats, args.seed, args.max_list_size)
+    if args.threads:
+        report['scaling'] = run_scaling(args.pipelines, args.distributions, args.sizes, args.threads, args.tasks,
+                                        args.seed, args.max_list_size)
+    if args.reduction:
+        report['reduction'] = run_reduction(args.distributions, args.sizes, args.seed)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for result, before in regressions:
+            print("REGRESSION %s %s %d: %.4fs -> %.4fs" % (result['pipeline'], result['distribution'], result['n'],
+                                                          before['median'], result['median']))
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
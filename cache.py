@@ -0,0 +1,153 @@
+import hashlib
+import os
+from collections import OrderedDict
+import numpy as np
+import hull
+
+# Least recently used cache of hull results keyed by a hash of the point buffer
+# Hulls are kept in memory up to a number of entries and a number of bytes, and optionally written
+# to a directory as .npz files so they outlive the process
+# When a point set is a cached set with more points appended to it, only the new points are run
+# through the hull algorithm together with the cached hull
+#
+#   cache = HullCache(directory='hulls')
+#   result = cache.convex_hull(points)
+#   print(cache.stats)
+class HullCache:
+    __slots__ = ('entries', 'lengths', 'nbytes', 'max_entries', 'max_bytes', 'directory',
+                 'algorithm', 'k', 'prefix_checks', 'stats')
+
+    # Parameters:
+    #   max_entries: The most hulls to keep in memory (Default: 1024)
+    #   max_bytes: The most bytes of hulls to keep in memory (Default: 64 MB)
+    #   directory: The directory of the on-disk tier, None to keep everything in memory (Default: None)
+    #   algorithm: The hull algorithm in hull.ALGORITHMS or 'auto' used on a miss (Default: 'graham')
+    #   k: The number of Akl-Toussaint directions used on a miss (Default: 8)
+    #   prefix_checks: The most cached set sizes to try as a prefix of a missed set (Default: 8)
+    def __init__(self, max_entries=1024, max_bytes=64 << 20, directory=None, algorithm='graham', k=8,
+                 prefix_checks=8):
+        if algorithm not in hull.ALGORITHMS and algorithm != 'auto':
+            raise ValueError("unknown algorithm '%s', expected one of %s" % (algorithm, ", ".join(hull.ALGORITHMS)))
+        # key -> (hull, number of points)
+        self.entries = OrderedDict()
+        # number of points -> number of entries of that size
+        self.lengths = {}
+        self.nbytes = 0
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.algorithm = algorithm
+        self.k = k
+        self.prefix_checks = prefix_checks
+        self.stats = {'hits': 0, 'disk_hits': 0, 'append_hits': 0, 'misses': 0, 'evictions': 0}
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    # Hash a point set and some of its prefixes in one pass over the buffer
+    # Parameters:
+    #   points: An (n, 2) array of points
+    #   prefixes: The prefix lengths to hash as well
+    # Returns:
+    #   The key of the whole set and a list of (length, key) pairs for the prefixes, longest first
+    @staticmethod
+    def keys(points, prefixes=()):
+        points = np.ascontiguousarray(points)
+        digest = hashlib.blake2b(points.dtype.str.encode(), digest_size=16)
+        found = []
+        done = 0
+        for length in sorted(prefixes):
+            digest.update(points[done:length])
+            found.append((length, digest.copy().hexdigest()))
+            done = length
+        digest.update(points[done:])
+        return digest.hexdigest(), found[::-1]
+
+    # Get a cached hull from memory or disk
+    # Parameters:
+    #   key: The key of the point set
+    # Returns:
+    #   The hull, or None if it isn't cached
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[0]
+
+        if self.directory is not None:
+            path = os.path.join(self.directory, key + '.npz')
+            if os.path.exists(path):
+                with np.load(path) as data:
+                    result, n = data['hull'], int(data['n'])
+                self.put(key, result, n, False)
+                self.stats['disk_hits'] += 1
+                return result
+        return None
+
+    # Add a hull to the cache and evict the least recently used ones past the limits
+    # Parameters:
+    #   key: The key of the point set
+    #   result: The hull of the point set
+    #   n: The number of points in the set
+    #   save: Whether to write the hull to the disk tier (Default: True)
+    def put(self, key, result, n, save=True):
+        result.setflags(write=False)
+        if key in self.entries:
+            return
+        self.entries[key] = (result, n)
+        self.lengths[n] = self.lengths.get(n, 0) + 1
+        self.nbytes += result.nbytes
+
+        if save and self.directory is not None:
+            np.savez(os.path.join(self.directory, key + '.npz'), hull=result, n=n)
+
+        while len(self.entries) > self.max_entries or (self.nbytes > self.max_bytes and len(self.entries) > 1):
+            _, (old, length) = self.entries.popitem(last=False)
+            self.nbytes -= old.nbytes
+            self.lengths[length] -= 1
+            if not self.lengths[length]:
+                del self.lengths[length]
+            self.stats['evictions'] += 1
+
+    # Find the convex hull of the given points, reusing cached results
+    # Parameters:
+    #   points: An (n, 2) array or a list of [x, y] points
+    # Returns:
+    #   A read-only (h, 2) array of the hull in counterclockwise order starting at the anchor
+    def convex_hull(self, points):
+        points = hull.as_points(points)
+        n = len(points)
+
+        prefixes = sorted((length for length in self.lengths if 0 < length < n), reverse=True)
+        key, prefix_keys = HullCache.keys(points, prefixes[:self.prefix_checks])
+        result = self.get(key)
+        if result is not None:
+            return result
+
+        # A known set with points appended only needs the new points added to its hull
+        for length, prefix in prefix_keys:
+            entry = self.entries.get(prefix)
+            if entry is not None:
+                self.entries.move_to_end(prefix)
+                self.stats['append_hits'] += 1
+                merged = np.concatenate((entry[0].astype(points.dtype, copy=False), points[length:]))
+                result = hull.convex_hull(merged, self.algorithm, self.k)
+                self.put(key, result, n)
+                return result
+
+        self.stats['misses'] += 1
+        result = hull.convex_hull(points, self.algorithm, self.k)
+        self.put(key, result, n)
+        return result
+
+    # Empty the in-memory tier, the disk tier is left alone
+    def clear(self):
+        self.entries.clear()
+        self.lengths.clear()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return "HullCache(%d hulls, %d bytes, %s)" % (len(self.entries), self.nbytes, self.stats)
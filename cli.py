@@ -0,0 +1,108 @@
+import argparse
+import logging
+import sys
+import time
+import numpy as np
+import hull
+
+# Command line entry point for the convex hull tools
+# Only numpy and the hull engine are loaded up front, matplotlib and pygame are imported by the
+# subcommands that draw so headless runs start quickly
+#
+#   python cli.py compute -n 1000000 --algorithm chan
+#   python cli.py compute --input points.npy
+#   python cli.py compute -n 1000000 --algorithm auto --verbose
+#   python cli.py bench --sizes 1e5 1e6
+#   python cli.py plot -n 1000
+#   python cli.py animate -n 50
+
+# Get the points to work on
+# Parameters:
+#   args: The parsed arguments with input, n, min, max and seed
+# Returns:
+#   An (n, 2) array of points
+def load_points(args):
+    if args.input:
+        import stream
+        chunks = list(stream.read_chunks(args.input))
+        if not chunks:
+            return np.empty((0, 2), dtype=np.int64)
+        return np.concatenate(chunks)
+    return np.random.default_rng(args.seed).integers(args.min, args.max, (args.n, 2), endpoint=True)
+
+def compute(args):
+    points = load_points(args)
+
+    start = time.perf_counter()
+    if args.cache:
+        import cache
+        result = cache.HullCache(directory=args.cache, algorithm=args.algorithm, k=args.k).convex_hull(points)
+    else:
+        result = hull.convex_hull(points, args.algorithm, args.k)
+    end = time.perf_counter()
+
+    if args.print:
+        for x, y in result.tolist():
+            print(x, y)
+    print("hull points: %d of %d in %.3fs" % (len(result), len(points), end - start), file=sys.stderr)
+
+def bench(args):
+    import bench
+    bench.main(args.rest)
+
+def plot(args):
+    import mainb
+    points = load_points(args)
+    mainb.plot_points(points, hull.convex_hull(points, args.algorithm, args.k))
+
+def animate(args):
+    import main
+    main.n = args.n
+    main.main()
+
+# Add the point source arguments to a subcommand
+def add_points_arguments(parser, n):
+    parser.add_argument('-n', type=int, default=n, help="number of random points")
+    parser.add_argument('--min', type=int, default=0, help="smallest random coordinate")
+    parser.add_argument('--max', type=int, default=10000, help="largest random coordinate")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--input', help=".npy file or text file with one point per line instead of random points")
+    parser.add_argument('--algorithm', default='graham', choices=sorted(hull.ALGORITHMS) + ['auto'],
+                        help="hull algorithm, auto picks the filter from a sample of the points and the algorithm "
+                             "from what the filter leaves")
+    parser.add_argument('-k', type=int, default=8, help="Akl-Toussaint directions, 0 to skip")
+    parser.add_argument('-v', '--verbose', action='store_true', help="log the plan picked by --algorithm auto")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convex hull tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('compute', help="find the convex hull without drawing anything")
+    add_points_arguments(command, 10**6)
+    command.add_argument('--print', action='store_true', help="print the hull points")
+    command.add_argument('--cache', help="directory to keep hull results in between runs")
+    command.set_defaults(run=compute)
+
+    command = commands.add_parser('bench', help="run the benchmark harness, arguments go to bench.py",
+                                  add_help=False)
+    command.set_defaults(run=bench)
+
+    command = commands.add_parser('plot', help="plot the points and their hull with matplotlib")
+    add_points_arguments(command, 1000)
+    command.set_defaults(run=plot)
+
+    command = commands.add_parser('animate', help="animate the Graham Scan with pygame")
+    command.add_argument('-n', type=int, default=50, help="number of random points")
+    command.set_defaults(run=animate)
+
+    # Unknown arguments are only allowed for bench, which parses them itself
+    args, rest = parser.parse_known_args(argv)
+    if rest and args.run is not bench:
+        parser.error("unrecognized arguments: %s" % ' '.join(rest))
+    args.rest = rest
+    if getattr(args, 'verbose', False):
+        logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+    args.run(args)
+
+if __name__ == "__main__":
+    main()
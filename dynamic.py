@@ -0,0 +1,87 @@
+from bisect import bisect_left
+import numpy as np
+from hull import ccw
+
+# Convex hull that points can be added to one at a time
+# Keeps the lower and upper chains of Andrew's Monotone Chain as lists sorted by x then y
+# A new point is placed with a binary search, checked against the chain edge it falls under and
+# then the chain points it hides are popped from both sides of it
+# Every point is pushed and popped at most once so an insert is O(log h) amortized comparisons
+# (plus the list memmove, which is tiny next to a full rebuild)
+class DynamicHull:
+    __slots__ = ('lower', 'upper')
+
+    # Parameters:
+    #   points: Starting points (Default: None)
+    def __init__(self, points=None):
+        self.lower = []
+        self.upper = []
+        for point in points if points is not None else []:
+            self.insert(point)
+
+    # Add a point to one of the chains
+    # Parameters:
+    #   chain: The chain to add to
+    #   point: The new point
+    #   side: 1 for the lower chain and -1 for the upper chain
+    # Returns:
+    #   True: The chain changed
+    #   False: The point is on or inside the chain
+    @staticmethod
+    def add(chain, point, side):
+        i = bisect_left(chain, point)
+        if i < len(chain) and chain[i] == point:
+            return False
+        # Inside the x range the point has to be strictly outside the edge it falls under
+        if 0 < i < len(chain) and side * ccw(chain[i - 1], chain[i], point) >= 0:
+            return False
+
+        chain.insert(i, point)
+
+        # Pop the points that are no longer convex on the right
+        while i + 2 < len(chain) and side * ccw(point, chain[i + 1], chain[i + 2]) <= 0:
+            del chain[i + 1]
+        # Pop the points that are no longer convex on the left
+        while i >= 2 and side * ccw(chain[i - 2], chain[i - 1], point) <= 0:
+            del chain[i - 1]
+            i -= 1
+        return True
+
+    # Add a point to the hull
+    # Parameters:
+    #   point: The new [x, y] point
+    # Returns:
+    #   True: The hull changed
+    #   False: The point was already inside the hull
+    def insert(self, point):
+        point = [point[0], point[1]]
+        lower = DynamicHull.add(self.lower, point, 1)
+        upper = DynamicHull.add(self.upper, point, -1)
+        return lower or upper
+
+    # Returns:
+    #   An (h, 2) array of the hull in counterclockwise order starting at the anchor
+    def hull(self):
+        if len(self.lower) < 2:
+            return np.array(self.lower).reshape(-1, 2)
+        hull = self.lower[:-1] + self.upper[:0:-1]
+
+        # The chains start at the leftmost point so rotate the hull to start at the anchor
+        start = min(range(len(hull)), key=lambda i: (hull[i][1], hull[i][0]))
+        return np.array(hull[start:] + hull[:start]).reshape(-1, 2)
+
+    # Check if a point is inside the hull or on its perimeter
+    # Parameters:
+    #   point: The [x, y] point to check
+    # Returns:
+    #   True: point is inside the hull
+    #   False: point is outside the hull
+    def contains(self, point):
+        point = [point[0], point[1]]
+        if not self.lower or point < self.lower[0] or point > self.lower[-1]:
+            return False
+        for chain, side in ((self.lower, 1), (self.upper, -1)):
+            i = bisect_left(chain, point)
+            if chain[i] != point and side * ccw(chain[i - 1], chain[i], point) < 0:
+                return False
+        return True
@@ -0,0 +1,104 @@
+from collections import namedtuple
+import numpy as np
+import filters
+import hull
+
+# Event trace of a Graham Scan run so the animation can be drawn after the algorithm has finished
+# Every event is an (op, index) row where index is a row of points:
+#   FILTER: The Akl-Toussaint heuristic threw the point away
+#   PUSH:   The point was added to the hull
+#   POP:    The last point of the hull was removed
+FILTER = 0
+PUSH = 1
+POP = 2
+
+Trace = namedtuple('Trace', ['points', 'events'])
+
+# Run the Graham Scan and record everything it does
+# Parameters:
+#   points: An (n, 2) array or a list of [x, y] points
+#   k: The number of Akl-Toussaint directions, 0 skips the heuristic (Default: 8)
+# Returns:
+#   A Trace of the points and an (m, 2) int64 array of events
+def graham_trace(points, k=8):
+    points = hull.as_points(points)
+    events = []
+
+    # Every thrown away point gets a FILTER event, written all at once
+    index = np.arange(len(points))
+    if k and len(points) >= 3:
+        keep = filters.akl_toussaint(points, k)[0]
+        removed = index[~keep]
+        events.append(np.stack((np.full(len(removed), FILTER), removed), axis=1))
+        index = index[keep]
+
+    scan = []
+    if len(index):
+        anchor = points[index[hull.get_anchor(points[index])]]
+        index = index[hull.angular_order(points[index], anchor)]
+        x = points[index, 0].tolist()
+        y = points[index, 1].tolist()
+        ids = index.tolist()
+
+        # Same scan as hull.scan but on indices, a copy of the top of the stack is skipped without an event
+        stack = []
+        for i, (px, py) in enumerate(zip(x, y)):
+            if stack and px == x[stack[-1]] and py == y[stack[-1]]:
+                continue
+            while len(stack) >= 2:
+                a, b = stack[-2], stack[-1]
+                if (x[b] - x[a]) * (py - y[a]) - (px - x[a]) * (y[b] - y[a]) > 0:
+                    break
+                stack.pop()
+                scan.append((POP, ids[b]))
+            stack.append(i)
+            scan.append((PUSH, ids[i]))
+
+    events.append(np.array(scan, dtype=np.int64).reshape(-1, 2))
+    return Trace(points, np.concatenate(events).astype(np.int64))
+
+# Replay a trace
+# Parameters:
+#   trace: The Trace to replay
+#   start: The first event to yield after (Default: 0)
+# Returns:
+#   A generator of (event number, filtered mask, hull index list) after each event
+#   The mask and list are updated in place so copy them to keep them
+def replay(trace, start=0):
+    filtered = np.zeros(len(trace.points), dtype=bool)
+    stack = []
+    for op, i in trace.events[:start].tolist():
+        apply(op, i, filtered, stack)
+
+    for j, (op, i) in enumerate(trace.events[start:].tolist(), start):
+        apply(op, i, filtered, stack)
+        yield j, filtered, stack
+
+# Apply one event to the replay state
+# Parameters:
+#   op, i: The event
+#   filtered: The mask of thrown away points
+#   stack: The hull as a list of point indices
+def apply(op, i, filtered, stack):
+    if op == FILTER:
+        filtered[i] = True
+    elif op == PUSH:
+        stack.append(i)
+    else:
+        stack.pop()
+
+# Save a trace to a compressed .npz file
+# Parameters:
+#   trace: The Trace to save
+#   path: The file to save to
+def save(trace, path):
+    np.savez_compressed(path, points=trace.points, events=trace.events)
+
+# Load a trace saved with save
+# Parameters:
+#   path: The .npz file
+# Returns:
+#   The Trace
+def load(path):
+    data = np.load(path)
+    return Trace(data['points'], data['events'])
@@ -0,0 +1,253 @@
+import numpy as np
+import hull
+
+# Number of points projected onto the extreme directions at a time
+CHUNK = 1 << 16
+
+# Widest integer x range column_extremes will bucket before falling back
+MAX_COLUMNS = 1 << 24
+
+# Get the k unit directions used to find the extreme points
+# The first direction points down and the rest follow counterclockwise so k = 4 gives the
+# bottom/right/top/left directions of akl_toussaint and k = 8 adds the diagonals of akl_toussaint_oct
+# Parameters:
+#   k: The number of directions
+# Returns:
+#   A (k, 2) array of directions
+def directions(k):
+    angle = -np.pi / 2 + 2 * np.pi * np.arange(k) / k
+    d = np.stack((np.cos(angle), np.sin(angle)), axis=1)
+    # Snap the axis directions to exact zeros
+    d[np.abs(d) < 1e-12] = 0
+    return d
+
+# Find the extreme point of the points array along each direction in a single pass
+# Parameters:
+#   points: An (n, 2) array of points
+#   k: The number of directions
+# Returns:
+#   The indices of the k extreme points
+def extremes(points, k=8):
+    d = directions(k)
+    best = np.full(k, -np.inf)
+    index = np.zeros(k, dtype=np.int64)
+
+    for start in range(0, len(points), CHUNK):
+        proj = d @ points[start:start + CHUNK].T
+        i = np.argmax(proj, axis=1)
+        value = proj[np.arange(k), i]
+        better = value > best
+        best[better] = value[better]
+        index[better] = start + i[better]
+
+    return index
+
+# Check which points are strictly inside a convex polygon
+# Binary searches the fan of triangles around polygon[0] for every point at once, so it takes
+# O(log m) vectorized passes over the points for a polygon with m vertices
+# Parameters:
+#   polygon: An (m, 2) array of the polygon in counterclockwise order
+#   points: An (n, 2) array of points
+#   strict: Whether points on the polygon perimeter count as outside (Default: True)
+# Returns:
+#   A boolean mask of the points inside the polygon
+def inside_convex(polygon, points, strict=True):
+    m = len(polygon)
+    inside = np.zeros(len(points), dtype=bool)
+    if m < 3:
+        return inside
+
+    x = points[:, 0] - polygon[0][0]
+    y = points[:, 1] - polygon[0][1]
+    vx = polygon[:, 0] - polygon[0][0]
+    vy = polygon[:, 1] - polygon[0][1]
+
+    # The point has to be in the wedge between the first and last edges around polygon[0]
+    first = vx[1] * y - x * vy[1]
+    last = vx[m - 1] * y - x * vy[m - 1]
+    if strict:
+        wedge = np.flatnonzero((first > 0) & (last < 0))
+    else:
+        wedge = np.flatnonzero((first >= 0) & (last <= 0))
+    x = x[wedge]
+    y = y[wedge]
+
+    # Find the last fan diagonal each point is to the left of
+    lo = np.ones(len(wedge), dtype=np.int64)
+    hi = np.full(len(wedge), m - 2, dtype=np.int64)
+    while np.any(lo < hi):
+        mid = (lo + hi + 1) // 2
+        left = vx[mid] * y - x * vy[mid] >= 0
+        lo = np.where(left, mid, lo)
+        hi = np.where(left, hi, mid - 1)
+
+    # Check the point against the polygon edge closing its triangle of the fan
+    ax, ay = vx[lo], vy[lo]
+    cross = (vx[lo + 1] - ax) * (y - ay) - (x - ax) * (vy[lo + 1] - ay)
+    inside[wedge] = cross > 0 if strict else cross >= 0
+    return inside
+
+# Akl_Toussaint Heuristic with any number of extreme directions
+# Creates a polygon out of the extreme points along k evenly spaced directions, any point strictly
+# inside it can't be on the convex hull thus can be removed
+# k = 4 is akl_toussaint and k = 8 is akl_toussaint_oct in mainb.py
+# Parameters:
+#   points: An (n, 2) array of points
+#   k: The number of extreme directions (Default: 8)
+# Returns:
+#   keep: A boolean mask of the points that can still be on the convex hull
+#   fraction: The fraction of points that survive the heuristic
+def akl_toussaint(points, k=8):
+    points = hull.as_points(points)
+    if len(points) == 0:
+        return np.ones(0, dtype=bool), 1.0
+
+    # The exact hull of the extremes makes the polygon convex even if a rounded projection picked a
+    # point that's not quite extreme
+    polygon = hull.graham_scan(points[np.unique(extremes(points, k))], k=0)
+
+    keep = np.empty(len(points), dtype=bool)
+    for start in range(0, len(points), CHUNK):
+        keep[start:start + CHUNK] = ~inside_convex(polygon, points[start:start + CHUNK])
+    return keep, np.count_nonzero(keep) / len(points)
+
+# Integer grid pre-filter keeping only the lowest and highest point of every x column
+# Any other point of a column is between those two so it can't be a hull vertex. One bucket per
+# column makes it a single O(n + range) pass with no sorting
+# Parameters:
+#   points: An (n, 2) array of points
+# Returns:
+#   keep: A boolean mask of the points that can still be on the convex hull, one point per column end
+#   fraction: The fraction of points that survive the filter
+#   None if the points aren't integers or the x range is too wide for the filter to help
+def column_extremes(points):
+    points = hull.as_points(points)
+    if not np.issubdtype(points.dtype, np.integer) or len(points) == 0:
+        return None
+    x = points[:, 0]
+    y = points[:, 1]
+    low = x.min()
+    columns = int(x.max()) - int(low) + 1
+    # It can't throw anything away once there are as many column ends as points
+    if columns > MAX_COLUMNS or 2 * columns >= len(points):
+        return None
+
+    column = x - low
+    lowest = np.full(columns, np.iinfo(np.int64).max)
+    highest = np.full(columns, np.iinfo(np.int64).min)
+    np.minimum.at(lowest, column, y)
+    np.maximum.at(highest, column, y)
+
+    # Copies of a column end are all the same point so only one of them is kept
+    keep = np.zeros(len(points), dtype=bool)
+    for end in (lowest, highest):
+        index = np.flatnonzero(y == end[column])
+        first = np.full(columns, -1)
+        first[column[index]] = index
+        keep[first[first >= 0]] = True
+    return keep, np.count_nonzero(keep) / len(points)
+
+# Throw away the points that can't be on the convex hull before running a hull algorithm
+# Runs column_extremes first when the points are on a narrow enough integer grid and then
+# akl_toussaint on whatever is left
+# Parameters:
+#   points: An (n, 2) array of points
+#   k: The number of Akl-Toussaint directions (Default: 8)
+# Returns:
+#   The points that can still be on the convex hull
+def prefilter(points, k=8):
+    columns = column_extremes(points)
+    if columns is not None:
+        points = points[columns[0]]
+    return points[akl_toussaint(points, k)[0]]
+
+# Collapse every ray of collinear points from the anchor to its farthest point
+# Only the farthest point of a ray can be a hull vertex, the closer ones (and every copy of a point)
+# would just be pushed and popped again by the scan. Collinear points share exactly the same
+# pseudo-angle, but so can 2 directions that rounded to the same key, so 2 neighbours in angular
+# order are only on the same ray when their keys are equal and their cross product is exactly 0
+# Parameters:
+#   points: An (n, 2) array of points
+#   anchor: The anchor point, the lowest y-coordinate and x-coordinate point
+# Returns:
+#   keep: A boolean mask of the anchor and the farthest point of every ray
+#   fraction: The fraction of points that survive
+#   order: The indices of the kept points in exact angular order, so they don't have to be sorted again
+def collapse_rays(points, anchor):
+    points = hull.as_points(points)
+    keep = np.zeros(len(points), dtype=bool)
+    if len(points) == 0:
+        return keep, 1.0, np.zeros(0, dtype=np.int64)
+
+    angle, x, y = hull.pseudo_angles(points, anchor)
+    order = hull.angular_order(points, anchor)
+    angle = angle[order]
+    x = x[order]
+    y = y[order]
+    at_anchor = (x == 0) & (y == 0)
+
+    # The last point of a ray is the farthest, the anchor is collinear with the ray to its right so
+    # it's kept on its own
+    same = np.flatnonzero(angle[1:] == angle[:-1])
+    same = same[hull.cross_signs(x[same], y[same], x[same + 1], y[same + 1]) == 0]
+    last = np.ones(len(points), dtype=bool)
+    last[same] = False
+    last[0] |= at_anchor[0]
+    last[1:] &= ~at_anchor[1:]
+    order = order[last]
+    keep[order] = True
+    return keep, np.count_nonzero(keep) / len(points), order
+
+# Remove every copy of a point but one
+# Copies are never more than one hull vertex, and when a set is mostly copies of a few points the
+# hull algorithm only has to sort those few. The points are sorted as x + iy complex keys, which is
+# a single 1D sort instead of the lexsort np.unique(points, axis=0) does
+# Parameters:
+#   points: An (n, 2) array of points
+# Returns:
+#   The distinct points in x then y order
+def distinct(points):
+    points = hull.as_points(points)
+    key = np.unique(points[:, 0] + 1j * points[:, 1])
+    return np.stack((key.real, key.imag), axis=1).astype(points.dtype)
+
+# Random sample throw away filter
+# The hull of a random sample of the points (and of their extremes along k directions) is inside
+# the real hull, so every point strictly inside it can be thrown away. Unlike the fixed polygon of
+# akl_toussaint it grows with the shape of the points, and while rounds keep throwing away a big
+# share of what's left another sample is drawn from the survivors, which are closer to the hull
+# Parameters:
+#   points: An (n, 2) array of points
+#   sample: The number of points sampled every round (Default: 1024)
+#   k: The number of extreme directions added to the first sample (Default: 16)
+#   rate: The smallest share of the points a round has to throw away for another round (Default: 0.5)
+#   seed: The random seed (Default: 0)
+# Returns:
+#   keep: A boolean mask of the points that can still be on the convex hull
+#   fraction: The fraction of points that survive the filter
+def sample_filter(points, sample=1024, k=16, rate=0.5, seed=0):
+    import query
+
+    points = hull.as_points(points)
+    keep = np.ones(len(points), dtype=bool)
+    if len(points) <= sample:
+        return keep, 1.0
+
+    rng = np.random.default_rng(seed)
+    index = np.arange(len(points))
+    polygon = points[np.unique(extremes(points, k))]
+    while True:
+        picked = points[index[rng.integers(0, len(index), sample)]]
+        polygon = hull.graham_scan(np.concatenate((polygon, picked)), k=0)
+        if len(polygon) < 3:
+            break
+
+        inside = query.HullIndex(polygon).contains(points[index], strict=True)
+        thrown = np.count_nonzero(inside)
+        index = index[~inside]
+        if thrown < rate * (len(index) + thrown) or len(index) <= sample:
+            break
+
+    keep[:] = False
+    keep[index] = True
+    return keep, len(index) / len(points)
@@ -0,0 +1,479 @@
+from functools import cmp_to_key
+import numpy as np
+import filters
+
+# Vectorized convex hull engine
+# Works on an (n, 2) int64/float64 array instead of a list of [x, y] lists so the Akl-Toussaint
+# heuristic, the anchor search, the angular sort keys and the distance tie-breaks are whole-array
+# operations and only the Graham Scan stack itself stays a Python loop
+# Integer coordinates should stay below 2^30 in magnitude so differences stay below 2^31 and the
+# vectorized cross products fit in int64. The Graham Scan and angular_order run their cross products
+# on Python ints but still take the offsets from the anchor and |x| + y in int64, so they're exact
+# while those stay below 2^63, which coordinates below 2^61 in magnitude always keep them. The
+# monotone chain is exact for any int64 coordinates
+
+# Pseudo-angles closer than this might be in the wrong order, rounding moves a key by at most 2^-52
+TIE = 2.0 ** -48
+
+# The keys of 2 integer directions with |x| + y below this differ by more than 1 / EXACT^2 > TIE, so
+# only copies and collinear points can be close and those already have exactly the same key
+EXACT = 2 ** 23
+
+# Convert the passed in points into an (n, 2) array the engine can work on
+# Parameters:
+#   points: An (n, 2) array or a list of [x, y] points
+# Returns:
+#   An (n, 2) int64 array for integer input, otherwise an (n, 2) float64 array
+def as_points(points):
+    points = np.asarray(points)
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError("points must have shape (n, 2)")
+    if np.issubdtype(points.dtype, np.integer):
+        return points.astype(np.int64, copy=False)
+    return points.astype(np.float64, copy=False)
+
+# Get the index of the anchor coordinate for the graph
+# Parameters:
+#   points: An (n, 2) array of all points in the graph
+# Returns:
+#   The index of the lowest y-coordinate and x-coordinate point on the graph
+def get_anchor(points):
+    y = points[:, 1]
+    lowest = np.flatnonzero(y == y.min())
+    return lowest[np.argmin(points[lowest, 0])]
+
+# Get the pseudo-angle of every point around the anchor
+# Increases with the polar angle like pseudo_angle in mainb.py
+# The key needs a division, a division free key like the cross product is a comparison between 2
+# points and not a number that a single lexsort can sort on. The division is rounded, so keys are
+# only used for the order where they're at least TIE apart and exact_order sorts the rest
+# Parameters:
+#   points: An (n, 2) array of points
+#   anchor: The anchor point
+# Returns:
+#   angle: An (n,) array of pseudo-angles, copies of the anchor get 0
+#   x, y: The offsets of the points from the anchor
+def pseudo_angles(points, anchor):
+    x = points[:, 0] - anchor[0]
+    y = points[:, 1] - anchor[1]
+
+    # Division is correctly rounded so collinear integer points get exactly the same key as long as
+    # |x| + y stays below 2^53, but different directions can round to the same key or to keys in
+    # the wrong order once the coordinates pass about 2^26
+    angle = np.zeros(len(points))
+    total = np.abs(x) + y
+    np.divide(x, total, out=angle, where=total != 0)
+    angle = 1 - angle
+    angle[total == 0] = 0
+    return angle, x, y
+
+# Sign of the cross product u x v of every pair of vectors, exact for integers
+# Parameters:
+#   ux, uy, vx, vy: Arrays of the vector coordinates
+# Returns:
+#   An array of -1, 0 and 1
+def cross_signs(ux, uy, vx, vy):
+    if not np.issubdtype(np.result_type(ux, vx), np.integer):
+        return np.sign(ux * vy - uy * vx).astype(np.int64)
+    if len(ux) == 0 or max(np.abs(ux).max(), np.abs(uy).max(), np.abs(vx).max(), np.abs(vy).max()) < 2 ** 31:
+        return np.sign(ux * vy - uy * vx)
+    # Products past int64 run on Python ints
+    return np.array([(a * d > b * c) - (a * d < b * c)
+                     for a, b, c, d in zip(ux.tolist(), uy.tolist(), vx.tolist(), vy.tolist())], dtype=np.int64)
+
+# Put the points back in exact angular order where their pseudo-angles were too close to trust
+# Adjacent keys less than TIE apart make a run, and a run with 2 neighbours that aren't copies or
+# collinear points with the same key is sorted again comparing cross products, like query.HullIndex
+# fixes up the triangles its rounded angles pick
+# Parameters:
+#   x, y: The offsets of the points from their anchor
+#   order: The indices of the points sorted by pseudo-angle and then distance
+#   angle: The pseudo-angle of every point
+#   segment: The set of every point when several sets are sorted together, runs never cross sets (Default: None)
+# Returns:
+#   The indices of the points in exact angular order
+def exact_order(x, y, order, angle, segment=None):
+    if np.issubdtype(x.dtype, np.integer) and (len(x) == 0 or (np.abs(x) + y).max() < EXACT):
+        return order
+    key = angle[order]
+    close = np.diff(key) <= TIE
+    if segment is not None:
+        close &= segment[order[1:]] == segment[order[:-1]]
+    pairs = np.flatnonzero(close)
+    if len(pairs) == 0:
+        return order
+
+    a = order[pairs]
+    b = order[pairs + 1]
+    wrong = (cross_signs(x[a], y[a], x[b], y[b]) != 0) | (key[pairs] != key[pairs + 1])
+    if not wrong.any():
+        return order
+
+    # Runs are the stretches between the pairs that aren't close
+    breaks = np.flatnonzero(~close)
+    order = order.copy()
+    done = -1
+    for pair in pairs[wrong].tolist():
+        if pair <= done:
+            continue
+        at = np.searchsorted(breaks, pair)
+        start = breaks[at - 1] + 1 if at > 0 else 0
+        end = breaks[at] + 1 if at < len(breaks) else len(order)
+        run = order[start:end].tolist()
+        offsets = dict(zip(run, zip(x[run].tolist(), y[run].tolist())))
+
+        # u before v when v is counterclockwise from u, then nearer first
+        def compare(i, j):
+            (ux, uy), (vx, vy) = offsets[i], offsets[j]
+            turn = ux * vy - uy * vx
+            if turn:
+                return -1 if turn > 0 else 1
+            return (abs(ux) + uy > abs(vx) + vy) - (abs(ux) + uy < abs(vx) + vy)
+
+        order[start:end] = sorted(run, key=cmp_to_key(compare))
+        done = end - 1
+    return order
+
+# Sort the points by increasing polar angle from the anchor, ties broken by distance
+# Same ordering as angular_sort in mainb.py, computed with a single lexsort on the pseudo-angle
+# Points on one ray from the anchor have |x| + y in the same order as their distance, which unlike
+# x^2 + y^2 can't overflow
+# Parameters:
+#   points: An (n, 2) array of points
+#   anchor: The anchor point
+# Returns:
+#   The indices of points in sorted order (the anchor is always first)
+def angular_order(points, anchor):
+    angle, x, y = pseudo_angles(points, anchor)
+
+    # lexsort sorts by the last key first
+    order = np.lexsort((np.abs(x) + y, angle))
+    return exact_order(x, y, order, angle)
+
+# https://algs4.cs.princeton.edu/91primitives/
+# Determines whether or not the passed in points form a counterclockwise angle
+# Parameters:
+#   a, b, c: Given Points
+# Returns:
+#   1:  If counterclockwise angle
+#   0:  If collinear
+#   -1: If clockwise angle
+def ccw(a, b, c):
+    return (b[0] - a[0]) * (c[1] - a[1]) - (c[0] - a[0]) * (b[1] - a[1])
+
+# Graham Scan over points already sorted by polar angle from the anchor
+# Copies of a point are next to each other in sorted order, so a point equal to the top of the
+# stack is skipped. Pushing it would only replace the top, except on a stack holding just the
+# anchor where it would leave the anchor on the hull twice
+# Parameters:
+#   points: A list of [x, y] points sorted by angular_order, anchor first
+# Returns:
+#   hull: The list of hull points in counterclockwise order starting at the anchor
+def scan(points):
+    hull = points[:1]
+
+    for point in points[1:]:
+        if point == hull[-1]:
+            continue
+        # Pop while the last 2 hull points and the new point don't make a ccw turn
+        while len(hull) >= 2:
+            (ax, ay), (bx, by) = hull[-2], hull[-1]
+            if (bx - ax) * (point[1] - ay) - (point[0] - ax) * (by - ay) > 0:
+                break
+            del hull[-1]
+        hull.append(point)
+
+    return hull
+
+# Hull of a set of fewer than 3 points, every distinct point starting at the anchor
+# Parameters:
+#   points: An (n, 2) array of points
+# Returns:
+#   An (h, 2) array of the distinct points, anchor first
+def small_hull(points):
+    points = np.unique(points, axis=0)
+    if len(points) == 0:
+        return points
+    return np.roll(points, -get_anchor(points), axis=0)
+
+# Find the convex hull of the given points
+# Parameters:
+#   points: An (n, 2) array or a list of [x, y] points
+#   k: The number of Akl-Toussaint directions, 0 skips the heuristic (Default: 8)
+# Returns:
+#   An (h, 2) array of the hull in counterclockwise order starting at the anchor
+def graham_scan(points, k=8):
+    points = as_points(points)
+    if len(points) < 3:
+        return small_hull(points)
+
+    # Throw away the points that can't be on the hull before sorting
+    if k:
+        points = filters.prefilter(points, k)
+
+    anchor = points[get_anchor(points)]
+    order = angular_order(points, anchor)
+
+    # The scan runs on Python numbers which are much faster to loop over than numpy scalars
+    hull = scan(points[order].tolist())
+    return np.array(hull, dtype=points.dtype).reshape(-1, 2)
+
+# Andrew's Monotone Chain algorithm
+# Sorts the points lexicographically and builds the lower and upper halves of the hull with the
+# same stack scan as the Graham Scan, so there's no angle or division anywhere
+# Parameters:
+#   points: An (n, 2) array or a list of [x, y] points
+#   k: The number of Akl-Toussaint directions, 0 skips the heuristic (Default: 8)
+# Returns:
+#   An (h, 2) array of the hull in counterclockwise order starting at the anchor
+def monotone_chain(points, k=8):
+    points = as_points(points)
+    if len(points) < 3:
+        return small_hull(points)
+
+    if k:
+        points = filters.prefilter(points, k)
+
+    # Sort by x then y
+    order = np.lexsort((points[:, 1], points[:, 0]))
+    sorted_points = points[order].tolist()
+    lower = scan(sorted_points)
+    upper = scan(sorted_points[::-1])
+    # A single distinct point is the whole hull, both halves would leave nothing after dropping their ends
+    hull = lower[:-1] + upper[:-1] if len(lower) > 1 else lower
+
+    # The lower half starts at the leftmost point so rotate the hull to start at the anchor
+    start = min(range(len(hull)), key=lambda i: (hull[i][1], hull[i][0]))
+    hull = hull[start:] + hull[:start]
+    return np.array(hull, dtype=points.dtype).reshape(-1, 2)
+
+# Check if b is a better next hull point than a when wrapping counterclockwise around p
+# Works on single points or elementwise on (x array, y array) pairs
+# Parameters:
+#   p: The current hull point
+#   a, b: The candidate points
+# Returns:
+#   True: b is to the right of p -> a, or collinear with it and farther away
+#   False: a is at least as good as b
+def wraps_further(p, a, b):
+    turn = ccw(p, a, b)
+    farther = (b[0] - p[0]) ** 2 + (b[1] - p[1]) ** 2 > (a[0] - p[0]) ** 2 + (a[1] - p[1]) ** 2
+    return (turn < 0) | ((turn == 0) & farther)
+
+# Find the tangent point of every mini hull as seen from a point outside of them
+# Seen from outside, the points of a mini hull turn clockwise up to the tangent, counterclockwise
+# down to the other tangent and clockwise again back to the start, so comparing the middle point
+# with its neighbour and with the first point tells which side of the middle the tangent is on
+# All the mini hulls are binary searched at the same time
+# Parameters:
+#   x, y: (g, m) arrays of the mini hull coordinates in counterclockwise order, padded to m points
+#   length: The number of points in every mini hull
+#   p: The point outside of the mini hulls
+# Returns:
+#   The index of the point of every mini hull with all its other points on the left of p -> that point
+def tangents(x, y, length, p):
+    rows = np.arange(len(length))
+
+    def at(i):
+        i = i % length
+        return x[rows, i], y[rows, i]
+
+    zero = np.zeros(len(length), dtype=np.int64)
+    first = at(zero)
+    first_up = wraps_further(p, first, at(zero + 1))
+    first_best = ~first_up & ~wraps_further(p, first, at(length - 1))
+
+    # Binary search for the first point that isn't before the tangent
+    lo = zero + 1
+    hi = length - 1
+    while np.any(lo < hi):
+        mid = (lo + hi) // 2
+        middle = at(mid)
+        up = wraps_further(p, middle, at(mid + 1))
+        past_first = wraps_further(p, first, middle)
+        before = np.where(first_up, up & past_first, up | ~past_first)
+        searching = lo < hi
+        lo = np.where(searching & before, mid + 1, lo)
+        hi = np.where(searching & ~before, mid, hi)
+
+    return np.where(first_best, 0, lo)
+
+# Gift wrap around the mini hulls starting at the anchor
+# Parameters:
+#   x, y: (g, m) arrays of the mini hull coordinates in counterclockwise order, padded to m points
+#   length: The number of points in every mini hull
+#   steps: The most hull points to find before giving up
+# Returns:
+#   The list of hull points in counterclockwise order starting at the anchor
+#   None if the hull has more than steps points
+def wrap(x, y, length, steps):
+    # The anchor is the lowest first point of all the mini hulls
+    group = np.lexsort((x[:, 0], y[:, 0]))[0]
+    index = 0
+    hull = [[x[group, 0].item(), y[group, 0].item()]]
+    groups = np.arange(len(length))
+
+    for _ in range(steps):
+        p = hull[-1]
+
+        # The next point in the current point's own mini hull is its successor there
+        candidate = tangents(x, y, length, p)
+        candidate[group] = (index + 1) % length[group]
+        cx = x[groups, candidate]
+        cy = y[groups, candidate]
+
+        # Knock out the worse half of the candidates until only the best is left
+        valid = (cx != p[0]) | (cy != p[1])
+        best, cx, cy = groups[valid], cx[valid], cy[valid]
+        if len(best) == 0:
+            return hull
+        while len(best) > 1:
+            half = len(best) // 2
+            a = slice(0, half)
+            b = slice(half, 2 * half)
+            better = wraps_further(p, (cx[a], cy[a]), (cx[b], cy[b]))
+            best = np.concatenate((np.where(better, best[b], best[a]), best[2 * half:]))
+            cx = np.concatenate((np.where(better, cx[b], cx[a]), cx[2 * half:]))
+            cy = np.concatenate((np.where(better, cy[b], cy[a]), cy[2 * half:]))
+
+        point = [cx[0].item(), cy[0].item()]
+        if point == hull[0]:
+            return hull
+        hull.append(point)
+        group = best[0]
+        index = candidate[group]
+
+    return None
+
+# Chan's Algorithm
+# Splits the points into groups of m, finds the mini hulls of all the groups in one batch.batch_hulls
+# call and gift wraps around the mini hulls for at most m steps using tangents found by binary search
+# m is squared until the wrap closes so the whole run is O(n log h) for a hull with h points
+# m starts at 256 instead of 4 since tiny groups only add Python overhead, and the mini hulls of the
+# next round are built from the mini hulls of the last one
+# Parameters:
+#   points: An (n, 2) array or a list of [x, y] points
+#   k: The number of Akl-Toussaint directions, 0 skips the heuristic (Default: 8)
+# Returns:
+#   An (h, 2) array of the hull in counterclockwise order starting at the anchor
+def chan(points, k=8):
+    points = as_points(points)
+    if len(points) < 3:
+        return small_hull(points)
+
+    import batch
+
+    if k:
+        points = filters.prefilter(points, k)
+    n = len(points)
+
+    # Copies are only removed inside every group by its Graham Scan, sorting all n points to remove
+    # them everywhere would cost O(n log n). A copy of the current point in another mini hull is
+    # a vertex of it, and the tangent from a vertex is its successor there, so the wrap still works
+
+    m = min(256, n)
+    hulls, offsets = batch.batch_hulls(points, np.append(np.arange(0, n, m), n), k=0)
+    while True:
+        # A single group's mini hull is the hull, wrapping around it would only walk its points
+        length = np.diff(offsets)
+        if len(length) == 1:
+            return hulls
+
+        # Mini hulls padded into (g, m) arrays
+        group = np.repeat(np.arange(len(length)), length)
+        column = np.arange(len(hulls)) - offsets[group]
+        x = np.zeros((len(length), length.max()), dtype=points.dtype)
+        y = np.zeros((len(length), length.max()), dtype=points.dtype)
+        x[group, column] = hulls[:, 0]
+        y[group, column] = hulls[:, 1]
+
+        hull = wrap(x, y, length, m)
+        if hull is not None:
+            return np.array(hull, dtype=points.dtype).reshape(-1, 2)
+
+        # Every new group is m old groups so its mini hull only needs the old mini hulls
+        merge = m
+        m = min(m * m, n)
+        hulls, offsets = batch.batch_hulls(hulls, np.append(offsets[:-1:merge], len(hulls)), k=0)
+
+# QuickHull Algorithm
+# Splits the points by the line between the leftmost and rightmost points, then keeps replacing every
+# hull edge with the 2 edges to the point farthest outside of it
+# The points outside each edge are kept as index arrays and split with one vectorized ccw per edge,
+# and the edges wait on a stack instead of recursing
+# Parameters:
+#   points: An (n, 2) array or a list of [x, y] points
+#   k: The number of Akl-Toussaint directions, 0 skips the heuristic (Default: 8)
+# Returns:
+#   An (h, 2) array of the hull in counterclockwise order starting at the anchor
+def quickhull(points, k=8):
+    points = as_points(points)
+    if len(points) < 3:
+        return small_hull(points)
+
+    if k:
+        points = filters.prefilter(points, k)
+
+    x = points[:, 0]
+    y = points[:, 1]
+    order = np.lexsort((y, x))
+    left = points[order[0]].tolist()
+    right = points[order[-1]].tolist()
+    # Both edges would push the same point when every point is a copy of it
+    if left == right:
+        return points[order[:1]]
+
+    # Points strictly to the right of the edge from a to b
+    def outside(a, b, index):
+        cross = ccw(a, b, (x[index], y[index]))
+        return index[cross < 0], cross[cross < 0]
+
+    everything = np.arange(len(points))
+    below, _ = outside(left, right, everything)
+    above, _ = outside(right, left, everything)
+
+    # Edges still to be split, the top of the stack is the next edge counterclockwise from left
+    hull = []
+    stack = [(right, left, above), (left, right, below)]
+    while stack:
+        a, b, index = stack.pop()
+        index, cross = outside(a, b, index)
+        if len(index) == 0:
+            hull.append(a)
+            continue
+        # Points tied for farthest lie on a line parallel to the edge and only its ends are on the hull
+        farthest = index[cross == cross.min()]
+        along = (x[farthest] - a[0]) * (b[0] - a[0]) + (y[farthest] - a[1]) * (b[1] - a[1])
+        c = points[farthest[np.argmax(along)]].tolist()
+        stack.append((c, b, index))
+        stack.append((a, c, index))
+
+    # Rotate the hull to start at the anchor
+    start = min(range(len(hull)), key=lambda i: (hull[i][1], hull[i][0]))
+    hull = hull[start:] + hull[:start]
+    return np.array(hull, dtype=points.dtype).reshape(-1, 2)
+
+# Hull algorithms available to convex_hull
+ALGORITHMS = {
+    'graham': graham_scan,
+    'monotone': monotone_chain,
+    'chan': chan,
+    'quickhull': quickhull,
+}
+
+# Find the convex hull of the given points with the chosen algorithm
+# Parameters:
+#   points: An (n, 2) array or a list of [x, y] points
+#   algorithm: The name of the algorithm in ALGORITHMS, or 'auto' to let planner.py pick the filter
+#     from a sample of the points and the algorithm from what the filter leaves (Default: 'graham')
+#   k: The number of Akl-Toussaint directions, the most planner.py may use for 'auto', 0 skips the
+#     heuristic (Default: 8)
+# Returns:
+#   An (h, 2) array of the hull in counterclockwise order starting at the anchor
+def convex_hull(points, algorithm='graham', k=8):
+    if algorithm == 'auto':
+        import planner
+        return planner.auto_hull(points, k)
+    if algorithm not in ALGORITHMS:
+        raise ValueError("unknown algorithm '%s', expected one of %s" % (algorithm, ", ".join(ALGORITHMS)))
+    return ALGORITHMS[algorithm](points, k)
@@ -0,0 +1,135 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+import mainb
+
+# Per-phase timing and hot path counters for the hull pipeline in mainb.py
+# Profiling swaps the mainb.py functions for counting wrappers and puts the originals back when it's
+# done, so nothing is counted and nothing costs anything while it's off
+#
+#   with instrument.profile() as report:
+#       mainb.main()
+#   print(instrument.to_json(report))
+
+# The phase every instrumented function belongs to
+PHASES = {
+    'akl_toussaint': 'filter',
+    'akl_toussaint_oct': 'filter',
+    'column_filter': 'filter',
+    'collapse': 'filter',
+    'sample_filter': 'filter',
+    'get_anchor': 'anchor',
+    'quicksort': 'sort',
+    'quicksort2': 'sort',
+    'quicksort3': 'sort',
+    'angular_sort': 'sort',
+    'graham_scan': 'scan',
+}
+
+# Create an empty report
+def new_report():
+    return {
+        'phases': {},
+        'counters': {
+            'ccw_calls': 0,
+            'stack_pops': 0,
+            'filter_points_in': 0,
+            'filter_points_removed': 0,
+            'sort_max_depth': 0,
+        },
+    }
+
+# Wrap a pipeline function so its calls are timed as a phase
+# Calls made from inside another phase (like quicksort recursing) only count towards the sort depth
+# Parameters:
+#   name: The name of the function in mainb.py
+#   function: The original function
+#   report: The report to record into
+#   memory: Whether to record the peak allocation of the phase
+#   running: The list of phases currently running
+# Returns:
+#   The wrapped function
+def wrap_phase(name, function, report, memory, running):
+    phase = PHASES[name]
+    counters = report['counters']
+
+    def wrapped(*args, **kwargs):
+        if running:
+            if phase != 'sort':
+                return function(*args, **kwargs)
+            running.append(phase)
+            counters['sort_max_depth'] = max(counters['sort_max_depth'], running.count('sort'))
+            try:
+                return function(*args, **kwargs)
+            finally:
+                running.pop()
+
+        if phase == 'sort':
+            counters['sort_max_depth'] = max(counters['sort_max_depth'], 1)
+        if memory:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        running.append(phase)
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            end = time.perf_counter()
+            running.pop()
+
+        stats = report['phases'].setdefault(phase, {'calls': 0, 'seconds': 0.0, 'peak_memory': 0})
+        stats['calls'] += 1
+        stats['seconds'] += end - start
+        if memory:
+            stats['peak_memory'] = max(stats['peak_memory'], tracemalloc.get_traced_memory()[1] - before)
+
+        if phase == 'filter':
+            counters['filter_points_in'] += len(args[0])
+            counters['filter_points_removed'] += max(0, len(args[0]) - len(result))
+        elif phase == 'scan' and result is not None:
+            # Every point is pushed onto the hull once so whatever isn't left on it was popped
+            counters['stack_pops'] += len(args[0]) - len(result)
+        return result
+
+    return wrapped
+
+# Profile everything the pipeline in mainb.py does inside the with block
+# Parameters:
+#   memory: Whether to record the peak allocation of every phase, which slows the run down (Default: False)
+# Returns:
+#   The report, filled in once the with block ends
+@contextmanager
+def profile(memory=False):
+    report = new_report()
+    running = []
+    originals = {name: getattr(mainb, name) for name in list(PHASES) + ['ccw']}
+
+    ccw = originals['ccw']
+    counters = report['counters']
+
+    def counted_ccw(a, b, c):
+        counters['ccw_calls'] += 1
+        return ccw(a, b, c)
+
+    if memory:
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+    try:
+        for name in PHASES:
+            setattr(mainb, name, wrap_phase(name, originals[name], report, memory, running))
+        mainb.ccw = counted_ccw
+        yield report
+    finally:
+        for name, function in originals.items():
+            setattr(mainb, name, function)
+        if memory and not tracing:
+            tracemalloc.stop()
+
+# Parameters:
+#   report: A report from profile
+# Returns:
+#   The report as a JSON string
+def to_json(report):
+    return json.dumps(report, indent=2)
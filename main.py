@@ -1,13 +1,15 @@
 from cmath import inf
 import pygame
 from random import randint
-from math import atan2
+import numpy as np
+import events
 
 # Screen Constants
 DIM = 800
 RADIUS = 5
 LINE = 2
 SPEED = 5 # FPS
+MAX_FRAMES = 1000 # Most frames in an animation, events are skipped evenly past this
 
 # Color Constants
 BLACK = (0, 0, 0) # Background
@@ -21,32 +23,96 @@ n = 50
 min = 50
 max = 750
 
-# Draws the current graph of points
+# Draws the points onto a cached background and shows it
+# Only the hull changes after this so update never has to draw the points again
 # Parameters:
 #   points: The graph of points
-def draw_graph(points, opoints=None, hull=None):
-    global screen
+#   opoints: The original points before the heuristic (Default: None)
+def draw_graph(points, opoints=None):
+    global screen, background, drawn
 
-    screen.fill(BLACK) # Set background to black
+    background = pygame.Surface((DIM, DIM))
+    background.fill(BLACK) # Set background to black
 
     if opoints != None:
-        for point in opoints:
-            pygame.draw.circle(screen, YELLOW, reverse_y(point), RADIUS)
+        draw_points(background, opoints, YELLOW)
+    draw_points(background, points, BLUE)
 
-    for point in points:
-        pygame.draw.circle(screen, BLUE, reverse_y(point), RADIUS)
+    screen.blit(background, (0, 0))
+    pygame.display.update()
+    drawn = []
 
-    if hull != None:
-        for i in range(len(hull) - 1):
-            pygame.draw.circle(screen, RED, reverse_y(hull[i]), RADIUS)
-            pygame.draw.circle(screen, RED, reverse_y(hull[i + 1]), RADIUS)
-            pygame.draw.line(screen, RED, reverse_y(hull[i]), reverse_y(hull[i + 1]))
-        pygame.draw.line(screen, RED, reverse_y(hull[len(hull) - 1]), reverse_y(hull[0]))
+# Draws points as circles, or as single pixels when there are too many for circles
+# Parameters:
+#   surface: The surface to draw on
+#   points: The points to draw
+#   color: The color to draw with
+def draw_points(surface, points, color):
+    if len(points) <= 2000:
+        for point in points:
+            pygame.draw.circle(surface, color, reverse_y(point), RADIUS)
+        return
+
+    pixels = np.asarray(points, dtype=int)
+    pixels = pixels[(pixels[:, 0] >= 0) & (pixels[:, 0] < DIM) & (pixels[:, 1] > 0) & (pixels[:, 1] <= DIM)]
+    array = pygame.surfarray.pixels3d(surface)
+    array[pixels[:, 0], DIM - pixels[:, 1]] = color
+    del array
+
+# Get the line segments of a hull including the one closing it
+# Parameters:
+#   hull: The hull points
+# Returns:
+#   A list of (a, b) point tuples
+def segments(hull):
+    hull = [tuple(point) for point in hull]
+    if len(hull) < 2:
+        return []
+    return list(zip(hull, hull[1:] + hull[:1]))
+
+# Get the area of the screen a hull segment and its end circles cover
+# Parameters:
+#   segment: The (a, b) points of the segment
+# Returns:
+#   The pygame Rect covering the segment
+def segment_rect(segment):
+    a = pygame.Rect(reverse_y(segment[0]), (1, 1))
+    b = pygame.Rect(reverse_y(segment[1]), (1, 1))
+    return a.union(b).inflate(2 * RADIUS + 2, 2 * RADIUS + 2)
 
+# Draws one hull segment with its end points
+# Parameters:
+#   segment: The (a, b) points of the segment
+#   color: The color to draw with (Default: RED)
+def draw_segment(segment, color=RED):
+    a, b = reverse_y(segment[0]), reverse_y(segment[1])
+    pygame.draw.circle(screen, color, a, RADIUS)
+    pygame.draw.circle(screen, color, b, RADIUS)
+    pygame.draw.line(screen, color, a, b)
+
+# Redraws only the hull segments that changed since the last update
+# The old segments are covered with the cached background, anything else they overlapped is drawn
+# again and only those areas of the display are updated
+# Parameters:
+#   points: The graph of points
+#   opoints: The original points before the heuristic (Default: None)
+#   hull: The current hull (Default: None)
 def update(points, opoints=None, hull=None):
-    global clock
-    draw_graph(points, opoints, hull)
-    pygame.display.update()
+    global clock, drawn
+
+    old = segments(drawn)
+    new = segments(hull or [])
+    same = set(old) & set(new)
+
+    dirty = [segment_rect(segment) for segment in old + new if segment not in same]
+    for rect in dirty:
+        screen.blit(background, rect, rect)
+    for segment in new:
+        if segment not in same or segment_rect(segment).collidelist(dirty) != -1:
+            draw_segment(segment)
+
+    pygame.display.update(dirty)
+    drawn = list(hull or [])
     clock.tick(SPEED)
 
 # Reverses the y coordinate to start from top left to bottom left
@@ -72,41 +138,6 @@ def get_anchor(points):
     
     return points[min_index]
 
-# Calculates the polar angle formed between 2 points
-# Parameters:
-#   a, b: Given Points
-# Returns:
-#   Polar angle between a and b
-def polar_angle(a):
-    global anchor
-    x = a[0] - anchor[0]
-    y = a[1] - anchor[1]
-    return atan2(y, x)
-
-# Calculates the cotangent formed between the anchor and the point
-# Parameters:
-#   a: Given Point
-# Returns:
-#   Cotangent between anchor and a
-def cotan(a):
-    global anchor
-    x = a[0] - anchor[0]
-    y = a[1] - anchor[1]
-    if y == 0:
-        return -max
-    return -x / y
-
-# Calculates the squared distance between the 2 points
-# Parameters:
-#   a, b: Given Points
-# Returns:
-#   Squared distance between a and b
-def distance(a):
-    global anchor
-    x = a[0] - anchor[0]
-    y = a[1] - anchor[1]
-    return x**2 + y**2
-
 # https://algs4.cs.princeton.edu/91primitives/
 # Determines whether or not the passed in points form a counterclockwise angle
 # Parameters:
@@ -118,93 +149,20 @@ def distance(a):
 def ccw(a, b, c):
     return (b[0] - a[0]) * (c[1] - a[1]) - (c[0] - a[0]) * (b[1] - a[1])
 
-# Sort the passed in array by increasing polar angle from starting point
-# Paramters:
-#   arr: The array to sort
-# Returns:
-#   Recursive call to quicksort for smaller and larger
-#   If equal return it sorted by distance
-def quicksort(arr):
-    if len(arr) <= 1:
-        return arr
-    # Create 3 separate arrays according to if their polar angle are smaller, equal to, or larger than the pivot
-    smaller = []
-    equal = []
-    larger = []
-    # Calculate the polar angle of a random point in our array to use as our pivot
-    # pivot = polar_angle(arr[randint(0, len(arr) - 1)])
-    # for point in arr:
-    #     angle = polar_angle(point)
-    #     if angle < pivot:
-    #         smaller.append(point)
-    #     elif angle == pivot:
-    #         equal.append(point)
-    #     else:
-    #         larger.append(point)
-
-    pivot = cotan(arr[randint(0, len(arr) - 1)])
-    for point in arr:
-        angle = cotan(point)
-        if angle < pivot:
-            smaller.append(point)
-        elif angle == pivot:
-            equal.append(point)
-        else:
-            larger.append(point)
-    return quicksort(smaller) + sorted(equal, key=distance) + quicksort(larger)
-
-def quicksort2(arr):
-    if len(arr) <= 1:
-        return arr
-    # Create 3 separate arrays according to if their polar angle are smaller, equal to, or larger than the pivot
-    smaller = []
-    equal = []
-    larger = []
-    # Calculate the polar angle of a random point in our array to use as our pivot
-    pivot = polar_angle(arr[randint(0, len(arr) - 1)])
-    for point in arr:
-        angle = polar_angle(point)
-        if angle < pivot:
-            smaller.append(point)
-        elif angle == pivot:
-            equal.append(point)
-        else:
-            larger.append(point)
-
-    # pivot = cotan(arr[randint(0, len(arr) - 1)])
-    # for point in arr:
-    #     angle = cotan(point)
-    #     if angle < pivot:
-    #         smaller.append(point)
-    #     elif angle == pivot:
-    #         equal.append(point)
-    #     else:
-    #         larger.append(point)
-    return quicksort(smaller) + sorted(equal, key=distance) + quicksort(larger)
-
 # Find the convex hull of the given points array
+# The scan runs at full speed and records its pushes and pops, the animation replays them afterwards
 # Parameters:
 #   points: The array to loop through
 # Pygame:
-#   Updates the graph with the calculated convex hull
+#   Updates the graph after every push and pop of the calculated convex hull
 def graham_scan(points, opoints=None):
-    global anchor
-
-    # Initialize hull to anchor and the first point (not including anchor) in points
-    hull = [anchor, points[0]]
-    update(points, opoints, hull)
-
-    # Loop through all remaining points
-    for point in points[1:]:
-        # If the last 2 points of the hull and the new point isn't ccw then delete the last point in hull
-        while ccw(hull[-2], hull[-1], point) <= 0:
-            del hull[-1]
-            if len(hull) < 2:
-                break
+    trace = events.graham_trace(points, k=0)
+    step = len(trace.events) // MAX_FRAMES + 1
+
+    for j, _, stack in events.replay(trace):
+        if (j + 1) % step == 0 or j == len(trace.events) - 1:
+            hull = trace.points[stack].tolist()
             update(points, opoints, hull)
-        # Adding the new point to the hull will be ccw
-        hull.append(point)
-        update(points, opoints, hull)
 
 # Akl_Toussaint Heuristic to reduce the number of points needed for the Graham Scan
 # Creates a quadrilateral out of the left/right/top/bottom most points in the points array
@@ -295,8 +253,8 @@ def area(a, b, c):
     return 0.5 * (((b[0] * c[1]) - (c[0] * b[1])) + ((c[0] * a[1]) - (a[0] * c[1])) + ((a[0] * b[1]) - (b[0] * a[1])))
 
 def main():
-    global screen, clock, anchor
-    
+    global screen, clock
+
     # Initialize Pygame Settings
     pygame.init()
 
@@ -307,27 +265,11 @@ def main():
     # Create n random points
     points = [[randint(min, max), randint(min, max)] for _ in range(n)]
 
-    # # Draw Initial Graph
-    # update(points)
-    # pygame.time.delay(2000) # Wait 2 seconds to load in screen before starting
-
-    # # Run Akl-Toussaint Heuristic
-    # npoints = akl_toussaint(points)
-
-    # Find the anchor coordinate in the graph
-    anchor = get_anchor(points)
-
-    # Sort points by increasing polar angle from anchor
-    npoints = quicksort(points)
-    opoints = quicksort2(points)
-
-    print(anchor)
-    print(npoints)
-    print(opoints)
-    print(npoints == opoints)
-    return
+    # Draw Initial Graph
+    draw_graph(points)
+    pygame.time.delay(2000) # Wait 2 seconds to load in screen before starting
 
-    graham_scan(points)    
+    graham_scan(points)
 
     # Run program until we quit the program
     while True:
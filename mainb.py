@@ -1,11 +1,11 @@
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sb
 import time
 from random import randint
-from math import atan2
+from math import atan2, inf
 from functools import cmp_to_key
+import hull
+import filters
+from pointset import PointSet
 
 # Create Points Variables (n points ranging from min to max)
 n = 100
@@ -18,6 +18,9 @@ max = 10000
 # Returns:
 #   The lowest y-coordinate and x-coordinate point on the graph
 def get_anchor(points):
+    if isinstance(points, PointSet):
+        return points[hull.get_anchor(points.data)]
+
     min_index = None
     for i, (x, y) in enumerate(points):
         if min_index == None or y < points[min_index][1]:
@@ -30,10 +33,10 @@ def get_anchor(points):
 # Calculates the polar angle formed between 2 points
 # Parameters:
 #   a: Given Point
+#   anchor: The anchor point
 # Returns:
 #   Polar angle between anchor and a
-def polar_angle(a):
-    global anchor
+def polar_angle(a, anchor):
     x = a[0] - anchor[0]
     y = a[1] - anchor[1]
     return atan2(y, x)
@@ -41,18 +44,40 @@ def polar_angle(a):
 # Calculates the cotangent formed between the anchor and the point
 # Parameters:
 #   a: Given Point
+#   anchor: The anchor point
 # Returns:
 #   Cotangent between anchor and a
-def cotan(a):
-    global anchor
+def cotan(a, anchor):
     x = a[0] - anchor[0]
     y = a[1] - anchor[1]
     if y == 0:
-        return -max
+        return -inf
     return -x / y
 
-def compare(a, b):
-    global anchor
+# Calculates a pseudo-angle between the anchor and the point
+# Increases with the polar angle from 0 to 2 like polar_angle increases from 0 to pi but needs no trigonometry
+# Collinear points always get exactly the same value since x / (|x| + y) is the same fraction for all of them
+# and Python divides ints with correct rounding, but 2 different directions can round to the same value
+# or the wrong way around once the coordinates pass about 2^26, see exact_runs
+# Parameters:
+#   a: Given Point
+#   anchor: The anchor point
+# Returns:
+#   Pseudo-angle between anchor and a
+def pseudo_angle(a, anchor):
+    x = a[0] - anchor[0]
+    y = a[1] - anchor[1]
+    if x == 0 and y == 0:
+        return 0
+    return 1 - x / (abs(x) + y)
+
+# Compares the polar angles of 2 points around the anchor
+# Parameters:
+#   a, b: Given Points
+#   anchor: The anchor point
+# Returns:
+#   -1, 0 or 1 like a comparison of the angle of b with the angle of a
+def compare(a, b, anchor):
     cross = ccw(anchor, a, b)
     if cross < 0:
         return -1
@@ -64,10 +89,10 @@ def compare(a, b):
 # Calculates the squared distance between the anchor and the point
 # Parameters:
 #   a: Given Points
+#   anchor: The anchor point
 # Returns:
 #   Squared distance between anchor and a
-def distance(a):
-    global anchor
+def distance(a, anchor):
     x = a[0] - anchor[0]
     y = a[1] - anchor[1]
     return x**2 + y**2
@@ -86,10 +111,11 @@ def ccw(a, b, c):
 # Sort the passed in array by increasing polar angle from starting point
 # Parameters:
 #   arr: The array to sort
+#   anchor: The anchor point the angles are measured from
 # Returns:
 #   Recursive call to quicksort for smaller and larger
 #   If equal return it sorted by distance
-def quicksort(arr):
+def quicksort(arr, anchor):
     if len(arr) <= 1:
         return arr
     # Create 3 separate arrays according to if their polar angle are smaller, equal to, or larger than the pivot
@@ -97,24 +123,25 @@ def quicksort(arr):
     equal = []
     larger = []
     # Calculate the cotangent of a random point in our array to use as our pivot
-    pivot = cotan(arr[randint(0, len(arr) - 1)])
+    pivot = cotan(arr[randint(0, len(arr) - 1)], anchor)
     for point in arr:
-        angle = cotan(point)
+        angle = cotan(point, anchor)
         if angle < pivot:
             smaller.append(point)
         elif angle == pivot:
             equal.append(point)
         else:
             larger.append(point)
-    return quicksort(smaller) + sorted(equal, key=distance) + quicksort(larger)
+    return quicksort(smaller, anchor) + sorted(equal, key=lambda p: distance(p, anchor)) + quicksort(larger, anchor)
 
 # Sort the passed in array by increasing polar angle from starting point
 # Parameters:
 #   arr: The array to sort
+#   anchor: The anchor point the angles are measured from
 # Returns:
 #   Recursive call to quicksort for smaller and larger
 #   If equal return it sorted by distance
-def quicksort2(arr):
+def quicksort2(arr, anchor):
     if len(arr) <= 1:
         return arr
     # Create 3 separate arrays according to if their polar angle are smaller, equal to, or larger than the pivot
@@ -122,24 +149,25 @@ def quicksort2(arr):
     equal = []
     larger = []
     # Calculate the cotangent of a random point in our array to use as our pivot
-    pivot = polar_angle(arr[randint(0, len(arr) - 1)])
+    pivot = polar_angle(arr[randint(0, len(arr) - 1)], anchor)
     for point in arr:
-        angle = polar_angle(point)
+        angle = polar_angle(point, anchor)
         if angle < pivot:
             smaller.append(point)
         elif angle == pivot:
             equal.append(point)
         else:
             larger.append(point)
-    return quicksort(smaller) + sorted(equal, key=distance) + quicksort(larger)
+    return quicksort(smaller, anchor) + sorted(equal, key=lambda p: distance(p, anchor)) + quicksort(larger, anchor)
 
 # Sort the passed in array by increasing polar angle from starting point
 # Parameters:
 #   arr: The array to sort
+#   anchor: The anchor point the angles are measured from
 # Returns:
 #   Recursive call to quicksort for smaller and larger
 #   If equal return it sorted by distance
-def quicksort3(arr):
+def quicksort3(arr, anchor):
     if len(arr) <= 1:
         return arr
     # Create 3 separate arrays according to if their polar angle are smaller, equal to, or larger than the pivot
@@ -149,38 +177,130 @@ def quicksort3(arr):
     # Calculate the cotangent of a random point in our array to use as our pivot
     pivot = arr[randint(0, len(arr) - 1)]
     for point in arr:
-        comp = compare(point, pivot)
+        comp = compare(point, pivot, anchor)
         if comp < 0:
             smaller.append(point)
         elif comp == 0:
             equal.append(point)
         else:
             larger.append(point)
-    return quicksort(smaller) + sorted(equal, key=distance) + quicksort(larger)
+    return quicksort(smaller, anchor) + sorted(equal, key=lambda p: distance(p, anchor)) + quicksort(larger, anchor)
+
+# Sort the passed in array by increasing polar angle from starting point
+# Sorts once on the pseudo-angle with ties broken by distance so there is no recursion and no list concatenation
+# Parameters:
+#   arr: The array to sort
+#   anchor: The anchor point the angles are measured from
+# Returns:
+#   A new sorted array (a PointSet is sorted by index without making any lists)
+def angular_sort(arr, anchor):
+    if isinstance(arr, PointSet):
+        return arr.take(hull.angular_order(arr.data, anchor))
+    angles = [pseudo_angle(p, anchor) for p in arr]
+    order = sorted(range(len(arr)), key=lambda i: (angles[i], distance(arr[i], anchor)))
+    return [arr[i] for i in exact_runs(arr, anchor, order, angles)]
+
+# Put points back in exact angular order where their pseudo-angles were too close to trust
+# Same as hull.exact_order: a run of keys less than hull.TIE apart holding 2 neighbours that aren't
+# collinear with the anchor or have different keys is sorted again with ccw, which is exact for ints
+# Parameters:
+#   arr: The points array
+#   anchor: The anchor point
+#   order: The indices of the points sorted by pseudo-angle and then distance
+#   angles: The pseudo-angle of every point
+# Returns:
+#   The indices of the points in exact angular order
+def exact_runs(arr, anchor, order, angles):
+    def before(i, j):
+        turn = ccw(anchor, arr[i], arr[j])
+        if turn:
+            return -1 if turn > 0 else 1
+        return (distance(arr[i], anchor) > distance(arr[j], anchor)) - (distance(arr[i], anchor) < distance(arr[j], anchor))
+
+    # Small integer coordinates can't give 2 directions keys this close, see hull.EXACT
+    if all(type(total) is int and total < hull.EXACT for total in (abs(p[0] - anchor[0]) + p[1] - anchor[1] for p in arr)):
+        return order
+
+    start = 0
+    for end in range(1, len(order) + 1):
+        if end < len(order) and angles[order[end]] - angles[order[end - 1]] <= hull.TIE:
+            continue
+        if end - start > 1 and any(angles[i] != angles[j] or ccw(anchor, arr[i], arr[j])
+                                   for i, j in zip(order[start:end - 1], order[start + 1:end])):
+            order[start:end] = sorted(order[start:end], key=cmp_to_key(before))
+        start = end
+    return order
+
+# Remove duplicate points and collapse every ray of collinear points from the anchor to its farthest point
+# Collinear points have exactly the same pseudo-angle so every ray is in one dictionary entry, which
+# holds a list since 2 directions can round to the same key, and a point only joins a ray it's
+# exactly collinear with. After this the Graham Scan never has to pop a collinear point
+# The rays are found in angular order, so the points come back sorted and don't need angular_sort
+# Parameters:
+#   points: The points array or PointSet
+#   anchor: The anchor point
+# Returns:
+#   npoints: The anchor followed by the farthest point of every ray in increasing polar angle
+def collapse(points, anchor):
+    if isinstance(points, PointSet):
+        return points.take(filters.collapse_rays(points.data, anchor)[2])
+
+    rays = {}
+    for p in points:
+        d = distance(p, anchor)
+        if d == 0:
+            continue
+        ray = rays.setdefault(pseudo_angle(p, anchor), [])
+        for best in ray:
+            if ccw(anchor, best[1], p) == 0:
+                if d > best[0]:
+                    best[0], best[1] = d, p
+                break
+        else:
+            ray.append([d, p])
+
+    # Only the ray ends are sorted, by key and then distance like angular_sort
+    ends = sorted((angle, d, p) for angle, ray in rays.items() for d, p in ray)
+    arr = [p for _, _, p in ends]
+    angles = [angle for angle, _, _ in ends]
+    return [anchor] + [arr[i] for i in exact_runs(arr, anchor, list(range(len(arr))), angles)]
 
 # Plot the passed in points array and hull using matplotlib
+# matplotlib is only imported here so computing a hull never has to load it
 # Parameters:
 #   points: The points array to plot
 #   hull: The convex hull to plot (Default: None)
 def plot_points(points, hull=None):
-    df = pd.DataFrame(points, columns=['x', 'y'])
-    plt.scatter(x=df['x'], y=df['y'], s=5)
-    
+    import matplotlib.pyplot as plt
+
+    points = np.asarray(points)
+    plt.scatter(x=points[:, 0], y=points[:, 1], s=5)
+
     # A hull was passed in to graph
-    if(hull != None):
-        for i in range(len(hull) - 1):
-            x = [hull[i][0], hull[i + 1][0]]
-            y = [hull[i][1], hull[i + 1][1]]
-            plt.plot(x, y, color='red')
-        plt.plot([hull[0][0], hull[-1][0]], [hull[0][1], hull[-1][1]], color='red')
+    if hull is not None and len(hull):
+        plot_polygon(hull, 'red')
     plt.show()
 
-# Find the convex hull of the given points array
+# Plot the outline of a polygon using matplotlib
 # Parameters:
-#   points: The array to loop through
-def graham_scan(points, opoints=None, plot=False):
-    global anchor
+#   polygon: The polygon points in order
+#   color: The line color
+def plot_polygon(polygon, color):
+    import matplotlib.pyplot as plt
+
+    polygon = np.asarray(polygon)
+    # Repeat the first point to close the polygon
+    plt.plot(np.append(polygon[:, 0], polygon[0, 0]), np.append(polygon[:, 1], polygon[0, 1]), color=color)
 
+# Find the convex hull of the given points array
+# Parameters:
+#   points: The array to loop through, sorted by polar angle from the anchor
+#   anchor: The anchor point
+#   opoints: The original points to plot (Default: None)
+#   plot: Whether to plot the points and the hull (Default: False)
+# Returns:
+#   hull: The convex hull in counterclockwise order starting at the anchor
+def graham_scan(points, anchor, opoints=None, plot=False):
     # Initialize hull to anchor and the first point (not including anchor) in points
     hull = [anchor, points[1]]
 
@@ -197,15 +317,21 @@ def graham_scan(points, opoints=None, plot=False):
     if plot:
         plot_points(opoints, hull)
 
+    return hull
+
 # Akl_Toussaint Heuristic to reduce the number of points needed for the Graham Scan
 # Creates a quadrilateral out of the left/right/top/bottom most points in the points array
 # Currently doesn't account for the edge cases involving some points being the same
 # Any point within this quadrilateral will not appear in the final convex hull thus can be removed
 # Parameters:
 #   points: The points array to search through
+#   plot: Whether to plot the quadrilateral (Default: False)
 # Returns:
 #   npoints: The new points array with only possible points for the convex hull algorithm
-def akl_toussaint(points):
+def akl_toussaint(points, plot=False):
+    if isinstance(points, PointSet):
+        return akl_toussaint_pointset(points, 4, plot)
+
     # New points array to return after heuristic is completed
     npoints = []
 
@@ -237,11 +363,8 @@ def akl_toussaint(points):
     if len(npoints) < 3: # Not a polygon
         return points
 
-    for i in range(len(npoints) - 1):
-        x = [npoints[i][0], npoints[i + 1][0]]
-        y = [npoints[i][1], npoints[i + 1][1]]
-        plt.plot(x, y, color='yellow')
-    plt.plot([npoints[0][0], npoints[-1][0]], [npoints[0][1], npoints[-1][1]], color='yellow')
+    if plot:
+        plot_polygon(npoints, 'yellow')
 
     # Append points outside of polygon to new points array
     for p in points:
@@ -261,9 +384,13 @@ def akl_toussaint(points):
 # Any point within this octagons will not appear in the final convex hull thus can be removed
 # Parameters:
 #   points: The points array to search through
+#   plot: Whether to plot the octagon (Default: False)
 # Returns:
 #   npoints: The new points array with only possible points for the convex hull algorithm
-def akl_toussaint_oct(points):
+def akl_toussaint_oct(points, plot=False):
+    if isinstance(points, PointSet):
+        return akl_toussaint_pointset(points, 8, plot)
+
     # Lowest y, Highest difference, Highest x, Highest sum, Highest y, Lowest difference, Lowest x, Lowest sum
     polygon = [points[0] for _ in range(8)]
 
@@ -304,11 +431,8 @@ def akl_toussaint_oct(points):
     if len(npoints) < 3: # Not a polygon
         return points
 
-    for i in range(len(npoints) - 1):
-        x = [npoints[i][0], npoints[i + 1][0]]
-        y = [npoints[i][1], npoints[i + 1][1]]
-        plt.plot(x, y, color='yellow')
-    plt.plot([npoints[0][0], npoints[-1][0]], [npoints[0][1], npoints[-1][1]], color='yellow')
+    if plot:
+        plot_polygon(npoints, 'yellow')
 
     # Append points outside of polygon to new points array
     for p in points:
@@ -321,6 +445,80 @@ def akl_toussaint_oct(points):
     
     return npoints
 
+# Akl_Toussaint Heuristic for a PointSet using the vectorized filter
+# Parameters:
+#   points: The PointSet to search through
+#   k: The number of extreme points in the polygon
+#   plot: Whether to plot the polygon (Default: False)
+# Returns:
+#   A PointSet of only the possible points for the convex hull algorithm, starting with the anchor
+def akl_toussaint_pointset(points, k, plot=False):
+    if plot:
+        plot_polygon(hull.graham_scan(points.data[np.unique(filters.extremes(points.data, k))], k=0), 'yellow')
+
+    keep = filters.akl_toussaint(points.data, k)[0]
+    first = hull.get_anchor(points.data)
+    keep[first] = False
+    return points.take(np.concatenate(([first], np.flatnonzero(keep))))
+
+# Random sample throw away filter, an alternative to akl_toussaint_oct
+# Throws away every point strictly inside the hull of a random sample of the points, repeating
+# with new samples while that keeps throwing away most of what's left
+# Parameters:
+#   points: The points array or PointSet to search through
+#   plot: Whether to plot the hull of the last sample (Default: False)
+# Returns:
+#   npoints: The new points with only possible points for the convex hull algorithm, starting with the anchor
+def sample_filter(points, plot=False):
+    data = points.data if isinstance(points, PointSet) else np.array(points).reshape(-1, 2)
+    if len(data) == 0:
+        return points
+    keep = filters.sample_filter(data)[0]
+    if plot:
+        plot_polygon(hull.graham_scan(data[keep]), 'yellow')
+
+    first = hull.get_anchor(data)
+    keep[first] = False
+    order = np.concatenate(([first], np.flatnonzero(keep)))
+    if isinstance(points, PointSet):
+        return points.take(order)
+    return [points[i] for i in order.tolist()]
+
+# Integer grid pre-filter keeping only the lowest and highest point of every x column
+# Can run ahead of or instead of akl_toussaint_oct, the points come back unchanged when they aren't
+# integers or there are too many columns for it to throw anything away
+# Parameters:
+#   points: The points array or PointSet to search through
+# Returns:
+#   npoints: The new points array with at most 2 points per x column
+def column_filter(points):
+    if isinstance(points, PointSet):
+        columns = filters.column_extremes(points.data)
+        if columns is None:
+            return points
+        return points.take(np.flatnonzero(columns[0]))
+
+    # Lowest and highest point of every column
+    lowest = {}
+    highest = {}
+    for p in points:
+        x, y = p
+        if not isinstance(x, int) or not isinstance(y, int):
+            return points
+        if x not in lowest or y < lowest[x][1]:
+            lowest[x] = p
+        if x not in highest or y > highest[x][1]:
+            highest[x] = p
+
+    if 2 * len(lowest) >= len(points):
+        return points
+
+    npoints = list(lowest.values())
+    for x, p in highest.items():
+        if p != lowest[x]:
+            npoints.append(p)
+    return npoints
+
 # Check if point is inside the polygon
 # If the point is on the left of all line segments in the polygon then it's inside the polygon
 # Parameters:
@@ -345,27 +543,26 @@ def is_inside_polygon(polygon, p):
     return True
 
 def main():
-    global anchor
-
     # for i in range(10):
     # Create n random points
-    points = [[randint(min, max), randint(min, max)] for _ in range(n)]
+    points = PointSet.random(n, min, max)
 
     # Get the starting time
     # start = time.time()
 
     # Run Akl-Toussaint Heuristic
-    npoints = akl_toussaint_oct(points)
+    npoints = sample_filter(column_filter(points), True)
     anchor = npoints[0]
 
     # Find the anchor coordinate in the graph
     # anchor = get_anchor(points)
 
-    # Sort points by increasing polar angle from anchor
-    npoints = quicksort(npoints)
+    # Remove duplicates and collinear points that can't be hull vertices, which also sorts the points
+    # by increasing polar angle from anchor
+    npoints = collapse(npoints, anchor)
 
     # Call Graham Scan Algorithm
-    graham_scan(npoints, points, True)
+    graham_scan(npoints, anchor, points, True)
 
     # Get the ending time
     # end = time.time()
@@ -0,0 +1,85 @@
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import hull
+
+# Find the convex hull of one shard of the points in a worker process
+# The points are read straight out of shared memory so they are never pickled
+# Parameters:
+#   name: The name of the shared memory block holding the points
+#   shape, dtype: The shape and dtype of the points array
+#   start, end: The rows of the shard
+#   algorithm: The hull algorithm in hull.ALGORITHMS
+#   k: The number of Akl-Toussaint directions
+# Returns:
+#   The convex hull of the shard
+def shard_hull(name, shape, dtype, start, end, algorithm, k):
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        points = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        return hull.convex_hull(points[start:end], algorithm, k)
+    finally:
+        block.close()
+
+# Find the convex hull of the given points on several cores
+# Splits the points into shards, finds every shard's hull in a process pool and merges the
+# shard hulls with one more hull pass over their points
+# Parameters:
+#   points: An (n, 2) array or a list of [x, y] points
+#   workers: The number of worker processes (Default: the number of cores)
+#   shards: The number of shards (Default: workers)
+#   algorithm: The hull algorithm in hull.ALGORITHMS (Default: 'graham')
+#   k: The number of Akl-Toussaint directions, 0 skips the heuristic (Default: 8)
+#   executor: An already running process pool to reuse (Default: None)
+# Returns:
+#   An (h, 2) array of the hull in counterclockwise order starting at the anchor
+def parallel_hull(points, workers=None, shards=None, algorithm='graham', k=8, executor=None):
+    points = hull.as_points(points)
+    workers = workers or os.cpu_count()
+    shards = shards or workers
+    if workers == 1 or len(points) < shards * 1000:
+        return hull.convex_hull(points, algorithm, k)
+
+    block = shared_memory.SharedMemory(create=True, size=points.nbytes)
+    pool = executor or ProcessPoolExecutor(workers)
+    try:
+        np.ndarray(points.shape, dtype=points.dtype, buffer=block.buf)[:] = points
+
+        bounds = np.linspace(0, len(points), shards + 1).astype(int)
+        futures = [pool.submit(shard_hull, block.name, points.shape, points.dtype, start, end, algorithm, k)
+                   for start, end in zip(bounds[:-1], bounds[1:])]
+        hulls = [future.result() for future in futures]
+    finally:
+        if executor is None:
+            pool.shutdown()
+        block.close()
+        block.unlink()
+
+    # Only the shard hull points can be on the final hull
+    return hull.convex_hull(np.concatenate(hulls), algorithm, 0)
+
+# Time parallel_hull with more and more workers and print the speedup over one worker
+def main():
+    n = 10**7
+    points = np.random.randint(0, 10001, (n, 2))
+    cores = os.cpu_count()
+
+    workers = 1
+    base = None
+    while workers <= cores:
+        with ProcessPoolExecutor(workers) as pool:
+            # Warm up the pool so process start up isn't timed
+            parallel_hull(points[:workers * 1000], workers, executor=pool)
+
+            start = time.time()
+            parallel_hull(points, workers, executor=pool)
+            end = time.time()
+
+        base = base or end - start
+        print("%2d workers: %.3fs (%.2fx)" % (workers, end - start, base / (end - start)))
+        workers *= 2
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import logging
+import time
+import numpy as np
+import filters
+import hull
+
+logger = logging.getLogger(__name__)
+
+# Adaptive pipeline for hull.convex_hull(points, 'auto')
+# Which filter wins depends on the points: the Akl-Toussaint polygon throws away almost everything
+# from a square or a disk but nothing from a circle, and the column filter only works on narrow
+# integer grids. A small sample of the points is enough to tell these apart, so the filter is picked
+# in microseconds. The hull engine is picked once the filter has run and the number of points left
+# is known exactly, and the whole plan is logged with the reasons it was picked
+#
+#   chosen = planner.plan(points)
+#   result = planner.run(points, chosen)
+#   print(chosen['filter'], chosen['k'], chosen['algorithm'], chosen['reason'])
+
+# Number of points sampled to plan with
+SAMPLE = 64
+
+# Share of the sample outside its Akl-Toussaint polygon above which the polygon isn't worth building
+FILTER_USELESS = 0.5
+
+# Smallest point set handed to the sample filter, below it its own sample is most of the set
+SAMPLE_FILTER = 4096
+
+# Smallest point set to estimate the duplicate rate of, removing copies doesn't pay off on smaller sets
+DUPLICATE_CHECK = 10000
+
+# Point sets estimated to have this many times fewer distinct points than points have their copies removed
+DISTINCT = 4
+
+# Point sets left with fewer points than this go to the monotone chain, its 2 plain sorts beat
+# working out the angle keys of the Graham Scan on a handful of points
+MONOTONE = 64
+
+# Akl-Toussaint survivors from this many on go to quickhull. They're a band along the hull with only
+# a few vertices in it, which quickhull throws away in a few vectorized passes instead of sorting
+QUICKHULL = 4096
+
+# Akl-Toussaint directions by k with the sample polygon edges made from them, kept since building them
+# costs as much as the rest of a plan
+DIRECTIONS = {}
+
+# Get the share of points outside the Akl-Toussaint polygon of a sample of them, and outside the
+# quadrilateral of the 4 axis directions among them when k is a multiple of 4 above 4
+# Both polygons come from the same extremes and are tested in one pass. The sample extremes are in
+# counterclockwise order already, a point is outside a polygon if it's right of any of its edges,
+# which is when its cross product with the edge is below the one of the edge's start
+# Parameters:
+#   picked: An (s, 2) array of sample points
+#   k: The number of Akl-Toussaint directions
+# Returns:
+#   survivors: The share of the sample outside the polygon
+#   quadrilateral: The share of the sample outside the quadrilateral, None if there isn't one
+def outside_shares(picked, k):
+    if k not in DIRECTIONS:
+        start = np.arange(k)
+        end = (start + 1) % k
+        if k > 4 and k % 4 == 0:
+            start = np.concatenate((start, start[::k // 4]))
+            end = np.concatenate((end, np.roll(start[k:], -1)))
+        DIRECTIONS[k] = filters.directions(k), start, end, np.arange(len(start))
+    d, start, end, edges = DIRECTIONS[k]
+    extreme = np.argmax(d @ picked.T, axis=1)
+    first = extreme[start]
+    edge = picked[extreme[end]] - picked[first]
+    cross = edge[:, 0, None] * picked[:, 1] - edge[:, 1, None] * picked[:, 0]
+    outside = cross < cross[edges, first][:, None]
+    survivors = np.count_nonzero(outside[:k].any(axis=0)) / len(picked)
+    if len(start) == k:
+        return survivors, None
+    return survivors, np.count_nonzero(outside[k:].any(axis=0)) / len(picked)
+
+# Estimate what a point set looks like from an evenly spaced sample of it
+# The extremes of the sample along the k directions make a smaller copy of the polygon akl_toussaint
+# builds, and the share of the sample outside it is close to the share of the whole set that
+# akl_toussaint would keep. Everything works on the few sample points directly so it takes tens of
+# microseconds, a lot less than the fixed cost of akl_toussaint itself
+# Parameters:
+#   points: An (n, 2) array of points
+#   k: The number of Akl-Toussaint directions (Default: 8)
+#   sample: The number of points to sample (Default: 64)
+# Returns:
+#   A dictionary of the estimates:
+#     n: The number of points
+#     duplicates: The share of the sample that are copies of other sample points, None for small sets
+#     distinct: The number of distinct points, estimated from how often sample points collide
+#     survivors: The share of the points expected to survive akl_toussaint
+#     quadrilateral: The share expected to survive akl_toussaint with the 4 axis directions, None
+#       unless k is a multiple of 4 above 4
+#     hull_points: The number of points expected to reach the hull algorithm after akl_toussaint
+def estimate(points, k=8, sample=SAMPLE):
+    n = len(points)
+    picked = points[::max(n // sample, 1)][:sample]
+    duplicates = None
+    distinct = n
+    if n >= DUPLICATE_CHECK:
+        repeats = np.count_nonzero(np.diff(np.sort(picked[:, 0] + 1j * picked[:, 1])) == 0)
+        duplicates = repeats / len(picked)
+        # Out of m distinct points about s^2 / 2m of the pairs in a sample of s collide
+        if repeats:
+            distinct = min(n, int(len(picked) * (len(picked) - 1) / (2 * repeats)))
+
+    survivors = 1.0
+    quadrilateral = None
+    if k >= 3 and n >= 3:
+        survivors, quadrilateral = outside_shares(picked, k)
+
+    return {'n': n, 'duplicates': duplicates, 'distinct': distinct, 'survivors': survivors,
+            'quadrilateral': quadrilateral, 'hull_points': int(survivors * n)}
+
+# Pick the hull engine for the points a filter left
+# The Graham Scan's angular sort is the fastest in general, but on a handful of points the monotone
+# chain's lexicographic sort is cheaper, and on a big band of Akl-Toussaint survivors quickhull is
+# (points left by the other filters are mostly hull vertices, which quickhull is slowest on)
+# Parameters:
+#   name: The filter that ran
+#   n: The number of points it left
+# Returns:
+#   algorithm: The hull engine in hull.ALGORITHMS
+#   reason: Why it was picked
+def engine(name, n):
+    if n < MONOTONE:
+        return 'monotone', "only %d points left to sort" % n
+    if name == 'prefilter' and n >= QUICKHULL:
+        return 'quickhull', "%d Akl-Toussaint survivors with few hull vertices among them" % n
+    return 'graham', "%d points left to sort" % n
+
+# Pick the filter for a set of points
+# prefilter is the fastest filter on most inputs, but when nearly every point is close to the hull
+# (points on a circle) the Akl-Toussaint polygon throws nothing away and only costs time, so the
+# column filter, removing copies or the sample filter take over, or nothing at all for small sets.
+# The quadrilateral is cheaper to filter with than the polygon of k directions, so it's used when
+# the sample says it throws away as much
+# The hull engine is left to run, which picks it with engine once it knows how many points are left,
+# the estimate of that from the sample is too rough to pick with
+# Parameters:
+#   points: An (n, 2) array or a list of [x, y] points
+#   k: The most Akl-Toussaint directions to use, 0 skips every filter (Default: 8)
+#   sample: The number of points to sample (Default: 64)
+# Returns:
+#   A dictionary of the plan:
+#     filter: 'none', 'prefilter' (filters.prefilter), 'column' (filters.column_extremes),
+#       'distinct' (filters.distinct) or 'sample' (filters.sample_filter)
+#     algorithm: The hull engine in hull.ALGORITHMS, None until run picks it
+#     k: The number of Akl-Toussaint directions
+#     stats: The estimates the plan was made from, None if there was nothing to estimate
+#     reason: Why the plan was picked
+def plan(points, k=8, sample=SAMPLE):
+    points = hull.as_points(points)
+    n = len(points)
+    if n < 3 or not k:
+        reason = "fewer than 3 points" if n < 3 else "filters turned off"
+        return {'filter': 'none', 'algorithm': None, 'k': k, 'stats': None, 'reason': reason}
+
+    stats = estimate(points, k, sample)
+    survivors = 100 * stats['survivors']
+    if stats['survivors'] <= FILTER_USELESS:
+        chosen = 'prefilter'
+        reason = "the Akl-Toussaint polygon leaves about %.0f%% of the points" % survivors
+        if stats['quadrilateral'] is not None and stats['quadrilateral'] <= stats['survivors']:
+            k = 4
+            reason += ", the quadrilateral as many"
+    else:
+        columns = None
+        if np.issubdtype(points.dtype, np.integer):
+            columns = int(points[:, 0].max()) - int(points[:, 0].min()) + 1
+        stats['columns'] = columns
+        if columns is not None and columns <= filters.MAX_COLUMNS and 2 * columns < n:
+            chosen = 'column'
+            reason = "the Akl-Toussaint polygon leaves about %.0f%% of the points but there are only %d x columns" % (
+                survivors, columns)
+        elif stats['distinct'] * DISTINCT <= n:
+            chosen = 'distinct'
+            reason = "the Akl-Toussaint polygon leaves about %.0f%% of the points but only about %d are distinct" % (
+                survivors, stats['distinct'])
+        elif n >= SAMPLE_FILTER:
+            chosen = 'sample'
+            reason = "the Akl-Toussaint polygon leaves about %.0f%% of the points, sampling follows the shape instead" % (
+                survivors)
+        else:
+            chosen = 'none'
+            reason = "the Akl-Toussaint polygon leaves about %.0f%% of the points and there are too few to sample" % (
+                survivors)
+
+    return {'filter': chosen, 'algorithm': None, 'k': k, 'stats': stats, 'reason': reason}
+
+# Find the convex hull of the given points with a plan
+# A plan without a hull engine gets one from engine after its filter has run, and the engine and
+# why it was picked are filled into the plan
+# Parameters:
+#   points: An (n, 2) array of points
+#   plan: A plan from plan
+# Returns:
+#   An (h, 2) array of the hull in counterclockwise order starting at the anchor
+def run(points, plan):
+    points = hull.as_points(points)
+    if plan['filter'] == 'prefilter':
+        points = filters.prefilter(points, plan['k'])
+    elif plan['filter'] == 'column':
+        columns = filters.column_extremes(points)
+        if columns is not None:
+            points = points[columns[0]]
+    elif plan['filter'] == 'distinct':
+        points = filters.distinct(points)
+    elif plan['filter'] == 'sample':
+        points = points[filters.sample_filter(points)[0]]
+    if plan['algorithm'] is None:
+        plan['algorithm'], reason = engine(plan['filter'], len(points))
+        plan['reason'] += ", " + reason
+    return hull.convex_hull(points, plan['algorithm'], 0)
+
+# Find the convex hull of the given points with the plan picked for them
+# Parameters:
+#   points: An (n, 2) array or a list of [x, y] points
+#   k: The most Akl-Toussaint directions to use, 0 skips every filter (Default: 8)
+# Returns:
+#   An (h, 2) array of the hull in counterclockwise order starting at the anchor
+def auto_hull(points, k=8):
+    points = hull.as_points(points)
+    chosen = plan(points, k)
+    result = run(points, chosen)
+    logger.info("auto plan for %d points: filter=%s k=%d algorithm=%s (%s)", len(points), chosen['filter'],
+                chosen['k'], chosen['algorithm'], chosen['reason'])
+    return result
+
+def main():
+    import bench
+
+    # Every plan the planner can pick, run on its own with every hull engine
+    filtering = [('none', 8), ('prefilter', 4), ('prefilter', 8), ('column', 8), ('distinct', 8), ('sample', 8)]
+    plans = {}
+    for name, k in filtering:
+        for algorithm in hull.ALGORITHMS:
+            label = '%s%s/%s' % (name, k if name == 'prefilter' else '', algorithm)
+            plans[label] = {'filter': name, 'algorithm': algorithm, 'k': k, 'reason': ''}
+    rng = np.random.default_rng(0)
+    shuffle = np.random.default_rng(1)
+    for n in (10**3, 10**4, 10**5, 10**6):
+        repeats = max(10, 10**5 // n)
+        for distribution, generate in bench.DISTRIBUTIONS.items():
+            points = generate(rng, n)
+            # Unfiltered million point sets take seconds and never come close to winning
+            runs = {name: (lambda chosen=chosen: run(points, chosen)) for name, chosen in plans.items()
+                    if n < 10**6 or chosen['filter'] != 'none'}
+            runs['auto'] = lambda: auto_hull(points)
+            # The plans take turns in a new order every round so a slow patch of the machine hits all of them alike
+            best = dict.fromkeys(runs, np.inf)
+            order = list(runs)
+            for _ in range(repeats):
+                shuffle.shuffle(order)
+                for name in order:
+                    start = time.perf_counter()
+                    runs[name]()
+                    best[name] = min(best[name], time.perf_counter() - start)
+
+            chosen = plan(points)
+            run(points, chosen)
+            print("n=%-8d %-10s auto %.5fs (%s%s/%s)  %s" % (
+                n, distribution, best['auto'], chosen['filter'], chosen['k'] if chosen['filter'] == 'prefilter' else '',
+                chosen['algorithm'], chosen['reason']))
+            # The best fixed plan for every engine
+            for algorithm in hull.ALGORITHMS:
+                fixed = min((name for name in runs if name.endswith('/' + algorithm)), key=best.get)
+                print("    best %-10s %.5fs (%s)  auto %+.0f%%" % (
+                    algorithm, best[fixed], fixed, 100 * (best['auto'] / best[fixed] - 1)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import numpy as np
+
+# Number of points turned into Python lists at a time when iterating
+CHUNK = 1 << 16
+
+# Compact set of points backed by one contiguous (n, 2) int64/float64 buffer
+# Takes 16 bytes per point instead of the ~120 bytes of a [x, y] list, slicing gives a view of the
+# same buffer and single points come out as [x, y] lists so the list based functions in mainb.py
+# can use it in place of a list of points
+class PointSet:
+    __slots__ = ('data',)
+
+    # Parameters:
+    #   data: An (n, 2) array, a flat array.array of x, y pairs or a list of [x, y] points
+    #     An array('q') or array('d') is used without a copy, other typecodes are converted
+    def __init__(self, data):
+        # asarray reads the buffer format of an array.array, so it's only copied by the conversion below
+        data = np.asarray(data)
+        if np.issubdtype(data.dtype, np.integer):
+            data = data.astype(np.int64, copy=False)
+        else:
+            data = data.astype(np.float64, copy=False)
+        self.data = data.reshape(-1, 2)
+
+    # Create n random points
+    # Parameters:
+    #   n: The number of points
+    #   min: The minimum value for the point's x and y coordinate
+    #   max: The maximum value for the point's x and y coordinate
+    #   seed: The random seed (Default: None)
+    # Returns:
+    #   A PointSet of n random points with their coordinates ranging from min to max
+    @staticmethod
+    def random(n, min, max, seed=None):
+        return PointSet(np.random.default_rng(seed).integers(min, max, (n, 2), endpoint=True))
+
+    def __len__(self):
+        return len(self.data)
+
+    # Parameters:
+    #   index: An int, a slice or an array of indices
+    # Returns:
+    #   A [x, y] list for an int, a view for a slice and a copy for an index array
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self.data[index].tolist()
+        return PointSet(self.data[index])
+
+    def __iter__(self):
+        for start in range(0, len(self.data), CHUNK):
+            yield from self.data[start:start + CHUNK].tolist()
+
+    # Parameters:
+    #   dtype: The dtype to convert the points to (Default: None, the buffer's own dtype)
+    #   copy: True to always copy, False to never copy and None to copy only for a dtype conversion
+    #     (Default: None)
+    # Returns:
+    #   The buffer itself, or a copy of it when a copy was asked for or the dtype is different
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None or np.dtype(dtype) == self.data.dtype:
+            return self.data.copy() if copy else self.data
+        if copy is False:
+            raise ValueError("converting a PointSet of %s to %s needs a copy" % (self.data.dtype, np.dtype(dtype)))
+        return self.data.astype(dtype)
+
+    def __repr__(self):
+        return "PointSet(%d points)" % len(self.data)
+
+    # Returns:
+    #   The number of bytes taken by the points
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    # Reorder the points by an index array such as the output of hull.angular_order
+    # Parameters:
+    #   order: The indices of the points in their new order
+    # Returns:
+    #   A new PointSet with the points in that order
+    def take(self, order):
+        return PointSet(self.data[order])
+
+    # Returns:
+    #   The points as a list of [x, y] lists
+    def tolist(self):
+        return self.data.tolist()
@@ -0,0 +1,156 @@
+import time
+import numpy as np
+import hull
+
+# Number of query points tested at a time
+CHUNK = 1 << 16
+
+# Number of angle buckets per hull vertex in the lookup table
+BUCKETS = 4
+
+# Largest number of diagonals in a bucket to step through before binary searching instead
+STEPS = 4
+
+# Point in hull index built once from a convex hull
+# The hull is split into a fan of triangles around its anchor. The pseudo-angles of the fan
+# diagonals are sorted and bucketed so every query point finds its triangle with a table lookup and
+# a few steps (or a binary search in crowded buckets), an exact cross product fixes up any point the
+# rounded angle put in the next triangle over, and one more cross product against the outer edge
+# of the triangle answers the query
+# Takes O(log h) per point and runs on whole arrays of points at once
+#
+#   index = HullIndex(hull.convex_hull(points))
+#   mask = index.contains(queries)
+class HullIndex:
+    __slots__ = ('polygon', 'vx', 'vy', 'angle', 'table')
+
+    # Parameters:
+    #   polygon: An (h, 2) array of a convex hull in counterclockwise order, like hull.convex_hull returns
+    def __init__(self, polygon):
+        polygon = hull.as_points(polygon)
+        # The fan has to start at the anchor so every vertex is above it
+        if len(polygon):
+            polygon = np.roll(polygon, -hull.get_anchor(polygon), axis=0)
+        self.polygon = polygon
+        self.vx = polygon[:, 0] - polygon[0, 0] if len(polygon) else polygon[:, 0]
+        self.vy = polygon[:, 1] - polygon[0, 1] if len(polygon) else polygon[:, 1]
+        # Angles of the diagonals from the anchor to vertices 1 to h - 1, which go from 0 up to 2
+        self.angle = hull.pseudo_angles(polygon[1:], polygon[0])[0] if len(polygon) else np.zeros(0)
+        # table[b] is the number of diagonals at or below the start of bucket b
+        buckets = BUCKETS * len(polygon)
+        self.table = np.searchsorted(self.angle, np.arange(buckets + 2) * (2 / max(buckets, 1)), side='right')
+
+    def __len__(self):
+        return len(self.polygon)
+
+    def __repr__(self):
+        return "HullIndex(%d vertices)" % len(self.polygon)
+
+    # Check which points are inside the hull
+    # Parameters:
+    #   points: An (m, 2) array or a list of [x, y] points
+    #   strict: Whether points on the hull perimeter count as outside (Default: False)
+    # Returns:
+    #   A boolean mask of the points inside the hull
+    def contains(self, points, strict=False):
+        points = hull.as_points(points)
+        inside = np.zeros(len(points), dtype=bool)
+        for start in range(0, len(points), CHUNK):
+            inside[start:start + CHUNK] = self.contains_chunk(points[start:start + CHUNK], strict)
+        return inside
+
+    # contains on a single chunk of points
+    def contains_chunk(self, points, strict):
+        m = len(self.polygon)
+        vx, vy = self.vx, self.vy
+        x = points[:, 0] - self.polygon[0, 0] if m else points[:, 0]
+        y = points[:, 1] - self.polygon[0, 1] if m else points[:, 1]
+
+        # A hull of less than 3 points is a point or a segment with nothing strictly inside it
+        if m < 3:
+            if strict or m == 0:
+                return np.zeros(len(points), dtype=bool)
+            if m == 1:
+                return (x == 0) & (y == 0)
+            on_line = vx[1] * y - x * vy[1] == 0
+            dot = x * vx[1] + y * vy[1]
+            return on_line & (dot >= 0) & (dot <= vx[1] * vx[1] + vy[1] * vy[1])
+
+        # The point has to be in the wedge between the first and last edges around the anchor
+        first = vx[1] * y - x * vy[1]
+        last = vx[m - 1] * y - x * vy[m - 1]
+        if strict:
+            wedge = np.flatnonzero((first > 0) & (last < 0))
+        else:
+            wedge = np.flatnonzero((first >= 0) & (last <= 0))
+        x = x[wedge]
+        y = y[wedge]
+
+        # Find the triangle (lo, lo + 1) of the fan from the rounded angle, lo is the number of
+        # diagonals at or below the angle
+        angle = np.zeros(len(x))
+        total = np.abs(x) + y
+        np.divide(x, total, out=angle, where=total != 0)
+        angle = 1 - angle
+        bucket = (angle * (BUCKETS * m / 2)).astype(np.intp)
+        lo = self.table[bucket]
+        hi = self.table[bucket + 1]
+
+        crowded = np.flatnonzero(hi - lo > STEPS)
+        lo[crowded] = np.searchsorted(self.angle, angle[crowded], side='right')
+        hi[crowded] = lo[crowded]
+        step = np.flatnonzero(lo < hi)
+        while len(step):
+            step = step[self.angle[lo[step]] <= angle[step]]
+            lo[step] += 1
+            step = step[lo[step] < hi[step]]
+        np.clip(lo, 1, m - 2, out=lo)
+
+        # Move the points the rounding put in the wrong triangle, the point has to be left of
+        # diagonal lo and right of diagonal lo + 1
+        while True:
+            below = vx[lo] * y - x * vy[lo] < 0
+            above = (lo < m - 2) & (vx[lo + 1] * y - x * vy[lo + 1] >= 0)
+            if not below.any() and not above.any():
+                break
+            lo = lo - below + above
+
+        # Check the point against the hull edge closing its triangle of the fan
+        ax, ay = vx[lo], vy[lo]
+        cross = (vx[lo + 1] - ax) * (y - ay) - (x - ax) * (vy[lo + 1] - ay)
+        inside = np.zeros(len(points), dtype=bool)
+        inside[wedge] = cross > 0 if strict else cross >= 0
+        return inside
+
+def main():
+    import mainb
+
+    rng = np.random.default_rng(0)
+    # Points on a circle so the hull has about 1000 vertices
+    theta = rng.random(1000) * 2 * np.pi
+    points = np.rint(np.stack((np.cos(theta), np.sin(theta)), axis=1) * 10**6).astype(np.int64)
+    polygon = hull.convex_hull(points)
+    queries = rng.integers(-10**6, 10**6, (10**7, 2), endpoint=True)
+
+    start = time.time()
+    index = HullIndex(polygon)
+    end = time.time()
+    print("%d vertex hull indexed in %.6fs" % (len(index), end - start))
+
+    start = time.time()
+    inside = index.contains(queries)
+    end = time.time()
+    print("%d queries: %.3fs (%.0f queries/s), %d inside" % (len(queries), end - start,
+                                                             len(queries) / (end - start), np.count_nonzero(inside)))
+
+    sample = queries[:10000].tolist()
+    vertices = polygon.tolist()
+    start = time.time()
+    for point in sample:
+        mainb.is_inside_polygon(vertices, point)
+    end = time.time()
+    print("is_inside_polygon: %d queries: %.3fs (%.0f queries/s)" % (len(sample), end - start,
+                                                                      len(sample) / (end - start)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import events
+
+# Render without opening a window
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+
+# Screen Constants (same as main.py)
+DIM = 800
+RADIUS = 5
+MARGIN = 20
+
+# Color Constants
+BLACK = (0, 0, 0) # Background
+RED = (255, 0, 0) # In Hull / Connection
+BLUE = (0, 0, 255) # Not in Hull
+YELLOW = (255, 255, 0) # Thrown away by the heuristic
+GREEN = (0, 255, 0) # Fully Complete Convex Hull
+
+# Scale the points to pixel coordinates with the y-axis starting from the bottom
+# Parameters:
+#   points: An (n, 2) array of points
+#   size: The width and height of the frame
+# Returns:
+#   An (n, 2) int array of pixel coordinates
+def to_pixels(points, size):
+    low = points.min(axis=0)
+    span = np.maximum(points.max(axis=0) - low, 1).max()
+    pixels = (points - low) * ((size - 2 * MARGIN - 1) / span) + MARGIN
+    pixels[:, 1] = size - 1 - pixels[:, 1]
+    return np.rint(pixels).astype(int)
+
+# Draw points onto a surface, as circles for small graphs and single pixels for large ones
+# Parameters:
+#   surface: The surface to draw on
+#   pixels: An (n, 2) array of pixel coordinates
+#   color: The color to draw with
+def draw_points(surface, pixels, color):
+    if len(pixels) <= 2000:
+        for point in pixels.tolist():
+            pygame.draw.circle(surface, color, point, RADIUS)
+    else:
+        array = pygame.surfarray.pixels3d(surface)
+        array[pixels[:, 0], pixels[:, 1]] = color
+        del array
+
+# Render a run of frames in a worker process
+# Parameters:
+#   path: The .npz trace file
+#   frames: A list of (frame number, event number) pairs in order
+#   directory: The directory to save the frames in
+#   size: The width and height of the frames
+def render_range(path, frames, directory, size):
+    trace = events.load(path)
+    pixels = to_pixels(trace.points, size)
+    last = len(trace.events) - 1
+
+    # Points are only drawn again when the heuristic has thrown more of them away
+    layer = pygame.Surface((size, size))
+    thrown = -1
+
+    wanted = {event: frame for frame, event in frames}
+    for j, filtered, stack in events.replay(trace, frames[0][1]):
+        if j not in wanted:
+            continue
+        count = np.count_nonzero(filtered)
+        if count != thrown:
+            layer.fill(BLACK)
+            draw_points(layer, pixels[filtered], YELLOW)
+            draw_points(layer, pixels[~filtered], BLUE)
+            thrown = count
+
+        frame = layer.copy()
+        color = GREEN if j == last else RED
+        hull = pixels[stack].tolist()
+        if len(hull) >= 2:
+            pygame.draw.lines(frame, color, j == last, hull, 2)
+        pygame.image.save(frame, os.path.join(directory, "frame_%06d.png" % wanted[j]))
+        if j == frames[-1][1]:
+            return
+
+# Render a trace to PNG frames on several processes
+# Parameters:
+#   trace: The Trace to render
+#   directory: The directory to save the frames in
+#   max_frames: The most frames to render, events are skipped evenly past this (Default: 1000)
+#   workers: The number of worker processes (Default: the number of cores)
+#   size: The width and height of the frames (Default: 800)
+# Returns:
+#   The number of frames rendered
+def render_frames(trace, directory, max_frames=1000, workers=None, size=DIM):
+    os.makedirs(directory, exist_ok=True)
+    count = len(trace.events)
+    if count == 0:
+        return 0
+
+    # Frame decimation, the last event is always drawn
+    step = max(1, -(-count // max_frames))
+    event_numbers = list(range(step - 1, count - 1, step)) + [count - 1]
+    frames = list(enumerate(event_numbers))
+
+    workers = workers or os.cpu_count()
+    chunk = -(-len(frames) // workers)
+    chunks = [frames[i:i + chunk] for i in range(0, len(frames), chunk)]
+
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, 'trace.npz')
+        events.save(trace, path)
+        with ProcessPoolExecutor(workers) as pool:
+            for future in [pool.submit(render_range, path, part, directory, size) for part in chunks]:
+                future.result()
+
+    return len(frames)
+
+# Join rendered frames into a video with ffmpeg
+# Parameters:
+#   directory: The directory of frames from render_frames
+#   output: The video file to write
+#   fps: The frames per second of the video (Default: 30)
+def to_video(directory, output, fps=30):
+    if shutil.which('ffmpeg') is None:
+        raise RuntimeError("ffmpeg is needed to make a video")
+    subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-framerate', str(fps),
+                    '-i', os.path.join(directory, 'frame_%06d.png'), '-pix_fmt', 'yuv420p', output], check=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a Graham Scan animation without a display")
+    parser.add_argument('-n', type=int, default=1000, help="number of random points")
+    parser.add_argument('-k', type=int, default=8, help="Akl-Toussaint directions, 0 to skip")
+    parser.add_argument('--frames', default='frames', help="directory to save the frames in")
+    parser.add_argument('--max-frames', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--size', type=int, default=DIM)
+    parser.add_argument('--video', help="also join the frames into this video file")
+    parser.add_argument('--fps', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    points = np.random.randint(0, 10001, (args.n, 2))
+    trace = events.graham_trace(points, args.k)
+    count = render_frames(trace, args.frames, args.max_frames, args.workers, args.size)
+    print("rendered %d frames from %d events" % (count, len(trace.events)))
+
+    if args.video:
+        to_video(args.frames, args.video, args.fps)
+
+if __name__ == "__main__":
+    main()
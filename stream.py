@@ -0,0 +1,86 @@
+import argparse
+import time
+from itertools import islice
+import numpy as np
+import hull
+
+# Read a points file in fixed size chunks
+# .npy files are memory mapped, anything else is read as text with one "x y" or "x,y" point per line
+# Parameters:
+#   path: The points file
+#   chunk_size: The number of points in every chunk (Default: 10^6)
+# Returns:
+#   A generator of (m, 2) arrays with m <= chunk_size
+def read_chunks(path, chunk_size=10**6):
+    if path.endswith('.npy'):
+        points = np.load(path, mmap_mode='r')
+        for start in range(0, len(points), chunk_size):
+            yield np.array(points[start:start + chunk_size])
+        return
+
+    with open(path) as f:
+        while True:
+            lines = list(islice(f, chunk_size))
+            if not lines:
+                return
+            values = ''.join(lines).replace(',', ' ').split()
+            try:
+                yield np.array(values, dtype=np.int64).reshape(-1, 2)
+            except ValueError:
+                yield np.array(values, dtype=np.float64).reshape(-1, 2)
+
+# Group an iterator of single [x, y] points into chunks
+# Parameters:
+#   points: Any iterable of [x, y] points
+#   chunk_size: The number of points in every chunk (Default: 10^6)
+# Returns:
+#   A generator of (m, 2) arrays with m <= chunk_size
+def batched(points, chunk_size=10**6):
+    points = iter(points)
+    while True:
+        chunk = list(islice(points, chunk_size))
+        if not chunk:
+            return
+        yield hull.as_points(chunk)
+
+# Find the convex hull of a stream of point chunks
+# Every chunk is folded into the running hull so only one chunk and the hull are in memory at a time
+# Parameters:
+#   chunks: An iterable of (m, 2) arrays
+#   algorithm: The hull algorithm in hull.ALGORITHMS (Default: 'graham')
+#   k: The number of Akl-Toussaint directions, 0 skips the heuristic (Default: 8)
+# Returns:
+#   hull: An (h, 2) array of the hull in counterclockwise order starting at the anchor
+#   count: The number of points read
+def stream_hull(chunks, algorithm='graham', k=8):
+    running = None
+    count = 0
+    for chunk in chunks:
+        chunk = hull.as_points(chunk)
+        count += len(chunk)
+        if running is not None:
+            dtype = np.result_type(running, chunk)
+            chunk = np.concatenate((running.astype(dtype, copy=False), chunk.astype(dtype, copy=False)))
+        running = hull.convex_hull(chunk, algorithm, k)
+
+    if running is None:
+        running = np.zeros((0, 2), dtype=np.int64)
+    return running, count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the convex hull of a points file too large for memory")
+    parser.add_argument('path', help=".npy file or text file with one point per line")
+    parser.add_argument('--chunk-size', type=int, default=10**6, help="points read at a time")
+    parser.add_argument('--algorithm', default='graham', choices=hull.ALGORITHMS)
+    parser.add_argument('-k', type=int, default=8, help="Akl-Toussaint directions, 0 to skip")
+    args = parser.parse_args(argv)
+
+    start = time.time()
+    result, count = stream_hull(read_chunks(args.path, args.chunk_size), args.algorithm, args.k)
+    end = time.time()
+
+    print("hull points: %d" % len(result))
+    print("points processed: %d in %.3fs (%.0f points/s)" % (count, end - start, count / max(end - start, 1e-9)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import time
+import numpy as np
+import hull
+from dynamic import DynamicHull
+
+# Points per block of precomputed hulls on the front stack
+BLOCK = 64
+
+# Convex hull of the points pushed in the last window seconds
+# A queue made of two stacks, since hulls can be merged but not split:
+#   back:  New points go here and into a DynamicHull, so its hull is always ready
+#   front: The older points in blocks, with the hull of every block and all the blocks after it
+#          worked out when the back stack was moved over. Expired points come off the front
+# The hull of the window is the merge of the hull of what's left of the oldest block, the
+# precomputed hull of the blocks after it and the hull of the back stack
+# Every point is inserted into a DynamicHull on the back and again when it moves to the front, so
+# a push is O(log h) amortized, and a query merges at most BLOCK points with 2 hulls
+#
+#   window = WindowHull(60)
+#   window.push([x, y], timestamp)
+#   window.hull()
+class WindowHull:
+    __slots__ = ('window', 'front', 'front_times', 'start', 'suffix', 'back', 'back_times', 'back_hull', 'latest')
+
+    # Parameters:
+    #   window: The number of seconds points stay in the hull
+    def __init__(self, window):
+        self.window = window
+        self.front = np.empty((0, 2))
+        self.front_times = np.empty(0)
+        self.start = 0
+        # suffix[j] is the hull of the front points from block j onwards
+        self.suffix = []
+        self.back = []
+        self.back_times = []
+        self.back_hull = DynamicHull()
+        self.latest = -np.inf
+
+    # Add a point to the window and expire the points that are too old
+    # Parameters:
+    #   point: The [x, y] point
+    #   timestamp: The time of the point in seconds, never before the last one (Default: now)
+    def push(self, point, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        if timestamp < self.latest:
+            raise ValueError("points must be pushed in time order")
+
+        point = [point[0], point[1]]
+        self.back.append(point)
+        self.back_times.append(timestamp)
+        self.back_hull.insert(point)
+        self.expire(timestamp)
+
+    # Remove the points that are more than window seconds older than now
+    # Points can't be pushed before now after this
+    # Parameters:
+    #   now: The current time in seconds
+    def expire(self, now):
+        self.latest = max(self.latest, now)
+        cutoff = now - self.window
+        if self.start < len(self.front) and self.front_times[self.start] > cutoff:
+            return
+        self.start += int(np.searchsorted(self.front_times[self.start:], cutoff, side='right'))
+        if self.start < len(self.front):
+            return
+
+        # The front stack is empty so the back stack moves over, dropping what's already expired
+        times = np.array(self.back_times)
+        keep = int(np.searchsorted(times, cutoff, side='right'))
+        self.front = np.array(self.back).reshape(-1, 2)[keep:]
+        self.front_times = times[keep:]
+        self.start = 0
+        self.back = []
+        self.back_times = []
+        self.back_hull = DynamicHull()
+
+        # Insert the front points newest first and keep the hull at every block boundary
+        self.suffix = [None] * -(-len(self.front) // BLOCK)
+        after = DynamicHull()
+        points = self.front.tolist()
+        for j in range(len(self.suffix) - 1, -1, -1):
+            for point in points[j * BLOCK:(j + 1) * BLOCK]:
+                after.insert(point)
+            self.suffix[j] = after.hull()
+
+    # Get the hull of the points in the window
+    # Parameters:
+    #   now: Expire the points that are too old at this time first (Default: the time of the last push)
+    # Returns:
+    #   An (h, 2) array of the hull in counterclockwise order starting at the anchor
+    def hull(self, now=None):
+        if now is not None:
+            self.expire(now)
+
+        parts = [self.back_hull.hull()]
+        if self.start < len(self.front):
+            block = self.start // BLOCK
+            parts.append(self.front[self.start:(block + 1) * BLOCK])
+            if block + 1 < len(self.suffix):
+                parts.append(self.suffix[block + 1])
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return np.empty((0, 2))
+        return hull.convex_hull(np.concatenate(parts), k=0)
+
+    def __len__(self):
+        return len(self.front) - self.start + len(self.back)
+
+    def __repr__(self):
+        return "WindowHull(%d points, %ss window)" % (len(self), self.window)
+
+def main():
+    rng = np.random.default_rng(0)
+    n = 20000
+    window = 2.0
+    # 1000 points a second so the window holds about 2000 points
+    times = np.cumsum(rng.exponential(1 / 1000, n))
+    points = rng.integers(0, 10001, (n, 2))
+
+    for tick in (1, 10, 100):
+        start = time.time()
+        windowed = WindowHull(window)
+        for i, (point, timestamp) in enumerate(zip(points.tolist(), times.tolist())):
+            windowed.push(point, timestamp)
+            if i % tick == 0:
+                windowed.hull()
+        end = time.time()
+        incremental = end - start
+
+        start = time.time()
+        first = 0
+        for i in range(0, n, tick):
+            first += int(np.searchsorted(times[first:], times[i] - window, side='right'))
+            hull.convex_hull(points[first:i + 1])
+        end = time.time()
+
+        print("query every %3d points: window hull %.3fs, recompute %.3fs (%.1fx)" %
+              (tick, incremental, end - start, (end - start) / incremental))
+
+if __name__ == "__main__":
+    main()